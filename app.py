@@ -1,6 +1,54 @@
+import hashlib
+import io
+from functools import partial
+
+import altair as alt
+import numpy as np
 import streamlit as st
 import pandas as pd
 
+from precos import (
+    BASE_CM,
+    FORMATOS_EXPORTACAO,
+    HistoricoAjustes,
+    LIMITE_CELULAS_CENARIOS,
+    MOTORES_CONSOLIDACAO,
+    MOTORES_XLSX,
+    ORDEM_COLUNAS,
+    PONTOS_EQUILIBRIO_PADRAO,
+    PRODUTOS_PARAMETROS,
+    TAMANHOS_PAGINA,
+    TarefaPipeline,
+    ArmazenamentoResultados,
+    CacheResultados,
+    Instrumentacao,
+    calcular_cenarios,
+    calcular_df_corp_sql,
+    cenarios_corporacao,
+    consolidar_corporacoes,
+    duckdb_disponivel,
+    etapas_em_paralelo,
+    estimar_mb_cenarios,
+    exportar_csv,
+    exportar_df_corp,
+    filtrar_corporacoes,
+    formatos_disponiveis,
+    hash_parametros,
+    opcoes_obs,
+    paginar_corporacoes,
+    precificar_cotacao,
+    precificar_cotacoes,
+    processar_base_12m,
+    processar_cotacoes,
+    processar_reajuste,
+    processar_usr,
+    recalcular_reajustes,
+    relatorio_cobertura,
+    resumir_carteira,
+    resumir_cenarios,
+    validar_entradas,
+)
+
 # =============================
 # AUTENTICAÇÃO
 # =============================
@@ -34,178 +82,174 @@ st.set_page_config(
     layout="wide"
 )
 
-# ============================
-# COMENTARIOS
-# ============================
-def classificar_motivo(row):
-    obs = [] # Começa com uma lista vazia
-
-    # 1. Verifica se ficou no piso (IPCA)
-    # Compara se a meta é igual ao financeiro (com pequena margem de tolerância, por conta do arredondamento)
-    if abs(row["reajuste_meta"] - row["indice_financeiro"]) < 0.001:
-        obs.append("IPCA")
-
-    # 2. Verifica Problema de Preço (Projeção futura ruim)
-    if row["reaj_preco"] > row["indice_financeiro"]:
-        obs.append("Problema de Preço")
-
-    # 3. Verifica Problema de Custo (Variação do Custo Médio positiva)
-    # Usa pd.notna para garantir que não é um erro de cálculo (NaN)
-    if pd.notna(row.get("var_cm")) and row["var_cm"] > 0:
-        obs.append("Problema de Custo")
-
-    # --- RESULTADO FINAL ---
-    if len(obs) == 0:
-        return "Em Análise" # Se não caiu em nenhuma regra
-    else:
-        return " + ".join(obs) # Junta tudo: "IPCA + Problema de Custo"
-
 # =============================
-# BASE DE PRODUTOS
+# MEMOIZAÇÃO POR CONTEÚDO
 # =============================
-PRODUTOS_PARAMETROS = {
-    "UNIMED EXECUTIVO": 2.288633433,
-    "UNIMED EXECUTIVO COMFORT": 2.041152113,
-    "UNIMED EXECUTIVO PREMIUM": 2.524444286,
-    "UNIMED NACIONAL REDE BASICA": 1.179901365,
-    "UNIMED NACIONAL REDE ESPECIAL": 1.651776142,
-    "UNIMED PLENO 80": 1.165320563,
-    "UNIMED PLENO 100": 1.650346651,
-    "UNIMED PLENO 200": 1.741369452,
-    "CORPORATIVO SUPERIOR APTO": 1.826545754,
-}
+# Guarda o resultado de cada etapa na sessão, chaveado pelo hash dos bytes
+# enviados; o arquivo atual de cada etapa não é lido duas vezes.
+def hash_arquivo(arquivo):
+    # Um hash por upload (o file_id muda a cada envio): reexecuções do
+    # fragmento dos arquivos não releem os bytes
+    hashes = st.session_state.setdefault("hash_uploads", {})
+    if arquivo.file_id not in hashes:
+        hashes[arquivo.file_id] = hashlib.sha256(arquivo.getvalue()).hexdigest()
+    return hashes[arquivo.file_id]
+
+
+# Uma entrada por etapa: a versão anterior sai antes de calcular a nova, e
+# trocar um arquivo libera os frames do arquivo antigo
+def descartar_etapa(cache, etapa):
+    for chave_cache in [c for c in cache if c[0] == etapa]:
+        del cache[chave_cache]
+
+
+# cache: o dicionário de etapas da tarefa (cópia do "cache_etapas" da
+# sessão), recebido como argumento porque as etapas rodam na thread da
+# TarefaPipeline (fora do script, sem acesso ao st.session_state). Cada
+# execução (ou reaproveitamento) fica registrada na instrumentação.
+def memoizar_etapa(cache, instrumentacao, etapa, chave, funcao, *args):
+    if (etapa, chave) in cache:
+        instrumentacao.registrar_cache(etapa, cache[(etapa, chave)])
+    else:
+        descartar_etapa(cache, etapa)
+        cache[(etapa, chave)] = instrumentacao.medir(etapa, funcao, *args)
 
+    return cache[(etapa, chave)]
 
-# =============================
-# BASE DE CUSTO MÉDIO (CM)
-# =============================
-BASE_CM = pd.DataFrame({
-    "faixa_etaria": [
-        "0-18", "19-23", "24-28", "29-33", "34-38",
-        "39-43", "44-48", "49-53", "54-58", "59-999"
-    ],
-    "cm_masculino": [
-        350.57, 154.03, 187.26, 219.73, 236.74,
-        277.15, 353.56, 400.63, 570.91, 1074.40
-    ],
-    "cm_feminino": [
-        246.35, 234.78, 335.68, 386.81, 401.83,
-        457.36, 501.02, 561.06, 615.32, 1058.30
-    ]
-})
 
+# Mesmo cache, mas as etapas que faltam rodam juntas num pool de threads; o
+# dicionário só é lido e escrito aqui, na thread que chamou.
+def memoizar_em_paralelo(cache, instrumentacao, tarefas):
+    with etapas_em_paralelo(instrumentacao, max_workers=len(tarefas)) as submeter:
+        futuros = {}
+        for etapa, chave, funcao, *args in tarefas:
+            if (etapa, chave) in cache:
+                instrumentacao.registrar_cache(etapa, cache[(etapa, chave)])
+            else:
+                descartar_etapa(cache, etapa)
+                futuros[(etapa, chave)] = submeter(etapa, funcao, *args)
 
-# =============================
-# FUNÇÃO DE PONTO DE EQUILÍBRIO
-# =============================
-def obter_ponto_equilibrio(vidas):
-    if vidas <= 199:
-        return 0.75
-    elif vidas <= 499:
-        return 0.78
-    elif vidas <= 999:
-        return 0.80
-    else:
-        return 0.82
+        for chave_cache, futuro in futuros.items():
+            cache[chave_cache] = futuro.result()
 
-# =============================
-# FUNÇÃO CENTRAL DE RECÁLCULO
-# =============================
-def recalcular_reajustes(df):
-    df = df.copy()
+    return [cache[(etapa, chave)] for etapa, chave, *_ in tarefas]
 
-    df["sinistralidade"] = (
-        df["custo_assistencial_liquido"] / df["receita_assistencial"]
-    )
 
-    df["fatmodproj"] = (
-        df["valor_receita_faturada_fator_moderador_esp017"].replace(0, pd.NA)
-        / df["custo_assistencial_bruto"].replace(0, pd.NA)
-    ) * df["custo_projetado"]
+# Armazenamento local dos resultados, compartilhado por todas as sessões:
+# sobrevive a refresh do navegador e a reinício do servidor
+@st.cache_resource
+def obter_armazenamento():
+    return ArmazenamentoResultados()
 
-    df["reaj_preco"] = (
-        (
-            (df["custo_projetado"].replace(0, pd.NA)
-             - df["fatmodproj"].replace(0, pd.NA))
-            / df["receita_sem_reajuste"].replace(0, pd.NA)
-        )
-        / pd.Series(0.75, index=df.index).replace(0, pd.NA)
-    ) - 1
 
-    df["reaj_preco"] = df[
-        ["reaj_preco", "indice_financeiro"]
-    ].max(axis=1)
-    
-    df["var_cm"] = (
-      df["custo_assistencial_bruto"].replace(0, pd.NA)
-     /   df["custo_projetado"].replace(0, pd.NA)
-     ) - 1
+# df_corp já calculados, em memória e compartilhados pelas sessões (LRU com
+# orçamento em MB): o segundo analista com os mesmos arquivos não recalcula
+# nem relê o SQLite
+@st.cache_resource
+def obter_cache_resultados():
+    return CacheResultados()
 
-    df["reajuste_meta"] = (
-        (
-            (
-                df["custo_assistencial_liquido"]
-                - df["ajuste_mv"]
-                - df["expurgo"]
-            )
-            / df["receita_assistencial"]
-            / 0.75
-        ) * (1 + df["indice_financeiro"]) - 1
-    )
 
-    df["reajuste_meta"] = df[
-        ["reajuste_meta", "indice_financeiro"]
-    ].max(axis=1)
+# A sessão recebe uma cópia rasa do resultado compartilhado (copy-on-write:
+# só as colunas alteradas pelos ajustes ganham memória própria), com os
+# ajustes manuais salvos para a chave. Depende do copy-on-write do pandas 3
+# (requirements.txt): no pandas 2 os ajustes de uma sessão alterariam o
+# frame de todas.
+def ativar_resultado(chave, df_base):
+    st.session_state["df_corp"] = obter_armazenamento().aplicar_ajustes(chave, df_base.copy(deep=False))
+    st.session_state["df_corp_chave"] = chave
+    st.session_state["historico_ajustes"] = HistoricoAjustes()
+
+
+# =============================
+# PIPELINE EM SEGUNDO PLANO
+# =============================
+# Etapas de cada motor, na ordem: base do progresso da TarefaPipeline
+ETAPAS_PIPELINE = {
+    "pandas": ["base_12m", "reajuste", "usr", "cobertura", "consolidacao", "recalcular_reajustes", "armazenamento"],
+    "duckdb": ["consolidacao_sql", "armazenamento"],
+}
+
 
-    df["reajuste_comercial"] = (
-        (
+# A tarefa e a cópia do cache de etapas dela saem juntas da sessão
+def descartar_tarefa():
+    st.session_state.pop("tarefa", None)
+    st.session_state.pop("cache_tarefa", None)
+
+
+# Arquivos -> df_corp salvo, indexado por id_corporacao. Roda na thread da
+# TarefaPipeline: nada de st.* aqui dentro; recebe os bytes dos uploads e o
+# cache de etapas da tarefa. A leitura do usr e a consulta do DuckDB param
+# no meio quando a tarefa é cancelada.
+def processar_arquivos(cache, armazenamento, chave_entrada, chaves, arquivos, nomes,
+                       motor_xlsx, motor_consolidacao, instrumentacao):
+    chave_base, chave_reaj, chave_usr = chaves
+    base_12m, reajuste, usr = arquivos
+
+    if motor_consolidacao == "duckdb":
+        # Junções e somas numa consulta SQL fora da memória; só o
+        # resultado por corporação volta para o pandas
+        df_corp = memoizar_etapa(
+            cache,
+            instrumentacao,
+            "consolidacao_sql",
+            chave_entrada,
+            partial(
+                calcular_df_corp_sql,
+                motor_xlsx=motor_xlsx,
+                interromper_ao_cancelar=instrumentacao.interromper_ao_cancelar
+            ),
+            base_12m, reajuste, usr
+        )
+    else:
+        # Os três arquivos são lidos ao mesmo tempo (só os que faltam no cache)
+        df_base_sel, df_reaj, df_custo_proj = memoizar_em_paralelo(cache, instrumentacao, [
+            ("base_12m", chave_base, processar_base_12m, base_12m, motor_xlsx),
+            ("reajuste", chave_reaj, processar_reajuste, reajuste),
             (
-                df["custo_assistencial_liquido"]
-                - df["ajuste_mv"]
-                - df["expurgo"]
-            )
-            / df["receita_assistencial"]
-            / df["ponto_equilibrio"]
-        ) * (1 + df["indice_financeiro"]) - 1
-    )
+                "usr", chave_usr,
+                partial(processar_usr, verificar_cancelamento=instrumentacao.verificar_cancelamento),
+                usr
+            ),
+        ])
 
-    df["reajuste_comercial"] = df[
-        ["reajuste_comercial", "indice_financeiro"]
-    ].max(axis=1)
+        # Quantos contratos / corporações ficam sem par em cada junção
+        memoizar_etapa(
+            cache,
+            instrumentacao,
+            "cobertura",
+            chave_entrada,
+            relatorio_cobertura,
+            df_base_sel, df_reaj, df_custo_proj
+        )
 
-    df["obs"] = df.apply(classificar_motivo, axis=1)
-    
-    df["ind_aporte"] = df["ponto_equilibrio"].apply(lambda x: "S" if x != 0.75 else "N")
+        # Merges + cálculo inicial só rodam de novo se algum arquivo mudar
+        df_corp = memoizar_etapa(
+            cache,
+            instrumentacao,
+            "consolidacao",
+            chave_entrada,
+            consolidar_corporacoes,
+            df_base_sel, df_reaj, df_custo_proj
+        )
+        df_corp = memoizar_etapa(
+            cache,
+            instrumentacao,
+            "recalcular_reajustes",
+            chave_entrada,
+            recalcular_reajustes,
+            df_corp
+        )
 
-    return df
+    instrumentacao.medir(
+        "armazenamento",
+        armazenamento.salvar_resultado,
+        chave_entrada, df_corp, nomes
+    )
 
+    # Resultado novo: os ajustes manuais começam zerados
+    return df_corp.set_index("id_corporacao", drop=False)
 
-# =============================
-# ORDEM DAS COLUNAS
-# =============================
-ORDEM_COLUNAS = [
-    "id_corporacao",
-    "empresa",
-    "vidas",
-    "receita_assistencial",
-    "custo_assistencial_liquido",
-    "ajuste_mv",
-    "expurgo",
-    "sinistralidade",
-    "indice_financeiro",
-    "ponto_equilibrio",
-    "reajuste_meta",
-    "reajuste_comercial",
-    "reaj_preco",
-    "var_cm",
-    "obs",
-    "ind_aporte"
-    ]
-
-# "valor_receita_faturada_fator_moderador_esp017",
-# "custo_assistencial_bruto",
-# "receita_sem_reajuste",
-# "custo_projetado"
 
 # =============================
 # HEADER
@@ -319,407 +363,630 @@ with tab_doc:
 # =============================
 # TAB PRICING
 # =============================
-with tab_pricing:
+# Cada bloco interativo é um st.fragment: mexer num widget reexecuta só o
+# fragmento dele. O pipeline dos arquivos só roda quando os uploads ou as
+# opções mudam; os blocos de resultado leem o df_corp do session_state.
+@st.fragment
+def cotacao_unica():
     col1, col2, col3 = st.columns(3)
 
     produto = col1.selectbox("Produto", list(PRODUTOS_PARAMETROS.keys()))
     valor_base = col2.number_input("Valor base (R$)", min_value=0.0, step=100.0)
     qtd_vidas = col3.number_input("Quantidade de vidas", min_value=1)
 
-    preco_ajustado = valor_base * PRODUTOS_PARAMETROS[produto]
-    margem = 1 - 0.15 - obter_ponto_equilibrio(qtd_vidas)
+    preco_ajustado, margem = precificar_cotacao(produto, valor_base, qtd_vidas)
 
     st.metric("Preço Ajustado", f"R$ {preco_ajustado:,.2f}")
     st.metric("Margem", f"{margem:.2%}")
 
+
+@st.fragment
+def cotacoes_em_lote():
+    # ---------- COTAÇÕES EM LOTE ----------
+    # Mesma conta do widget acima, aplicada à planilha inteira de uma vez
+    st.markdown("---")
+    st.subheader("📋 Cotações em lote")
+    st.caption("CSV (;) ou XLSX com as colunas produto, valor_base e vidas.")
+
+    cotacoes_file = st.file_uploader("Upload da lista de cotações", type=["csv", "xlsx"])
+
+    if cotacoes_file:
+        try:
+            df_cotacoes = precificar_cotacoes(
+                processar_cotacoes(cotacoes_file.getvalue(), cotacoes_file.name)
+            )
+        except (KeyError, ValueError) as erro:
+            # Colunas ausentes ou arquivo ilegível; valores ruins viram erro por linha
+            st.error(f"Planilha de cotações inválida: {erro}")
+        else:
+            invalidos = int(df_cotacoes["erro"].notna().sum())
+            q1, q2, q3 = st.columns(3)
+            q1.metric("Cotações", f"{len(df_cotacoes):,}")
+            q2.metric("Preço ajustado total", f"R$ {np.nansum(df_cotacoes['preco_ajustado']):,.2f}")
+            q3.metric("Cotações com erro", f"{invalidos:,}")
+            if invalidos:
+                st.warning(
+                    "Cotações com produto fora da tabela ou valor_base / vidas ausente ou não numérico "
+                    "ficam sem preço e margem; o motivo está na coluna erro."
+                )
+
+            st.dataframe(
+                df_cotacoes,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "preco_ajustado": st.column_config.NumberColumn("Preço ajustado", format="R$ %.2f"),
+                    "margem": st.column_config.NumberColumn("Margem", format="percent"),
+                    "ponto_equilibrio": st.column_config.NumberColumn("Ponto de equilíbrio", format="percent"),
+                }
+            )
+
+            # Como na exportação do resultado: o download adiado só aceita bytes / BytesIO
+            def gerar_cotacoes():
+                arquivo = io.BytesIO()
+                exportar_csv(df_cotacoes, arquivo, list(df_cotacoes.columns))
+                return arquivo
+
+            st.download_button(
+                "⬇️ Baixar cotações precificadas (CSV)",
+                data=gerar_cotacoes,
+                file_name="cotacoes_precificadas.csv",
+                mime="text/csv"
+            )
+
+
+with tab_pricing:
+    cotacao_unica()
+    cotacoes_em_lote()
+
+
 # =============================
 # TAB ARQUIVOS
 # =============================
-with tab_arquivos:
+@st.fragment
+def aba_arquivos():
 
     base_12m = st.file_uploader("Upload base_12m.xlsx", type=["xlsx"])
     reajuste_file = st.file_uploader("Upload Reajuste_MMYYYY.csv", type=["csv"])
     usr_file = st.file_uploader("Upload usr_MMYY.csv", type=["csv"])
 
+    armazenamento = obter_armazenamento()
+    cache_resultados = obter_cache_resultados()
+    arquivos_enviados = bool(base_12m and reajuste_file and usr_file)
+    chave_atual = None
+
+    # ==================================================
+    # RESULTADOS SALVOS (sem reenviar os arquivos)
+    # ==================================================
+    if not arquivos_enviados:
+        df_salvos = armazenamento.listar()
+        if not df_salvos.empty:
+            rotulos = dict(zip(
+                df_salvos["chave"],
+                df_salvos["criado_em"].str.replace("T", " ") + " · " + df_salvos["arquivos"].fillna("")
+                + " · " + df_salvos["linhas"].map("{:,} corporações".format)
+                + " · " + df_salvos["ajustes"].map("{} ajuste(s)".format)
+            ))
+            chave_atual = st.selectbox(
+                "💾 Reabrir resultado salvo",
+                list(rotulos),
+                format_func=rotulos.get,
+                index=None,
+                placeholder="Escolha um processamento anterior"
+            )
+            if chave_atual is not None and st.session_state.get("df_corp_chave") != chave_atual:
+                df_base = cache_resultados.obter(chave_atual)
+                if df_base is None:
+                    df_base = armazenamento.carregar_resultado(chave_atual)
+                    cache_resultados.guardar(chave_atual, df_base)
+                ativar_resultado(chave_atual, df_base)
+
     # ==================================================
     # PROCESSAMENTO DOS ARQUIVOS
     # ==================================================
-    if base_12m and reajuste_file and usr_file:
-
-        # ---------- BASE 12M ----------
-        df_base = pd.read_excel(base_12m)
-
-        df_base.columns = (
-            df_base.columns.str.strip().str.lower()
-            .str.replace(" ", "_")
-            .str.replace("ç", "c")
-            .str.replace("ã", "a")
-            .str.replace("á", "a")
-            .str.replace("é", "e")
-            .str.replace("í", "i")
-            .str.replace("ó", "o")
-            .str.replace("ú", "u")
-        )
+    if arquivos_enviados:
 
-        df_base_sel = df_base[
-            ["id_contrato", "id_corporacao", "receita_assistencial",
-             "custo_assistencial_liquido", "custo_assistencial_bruto",
-             "valor_receita_faturada_fator_moderador_esp017"]
-        ]
-
-        df_base_corp = (
-            df_base_sel
-            .groupby("id_corporacao", as_index=False)
-            .agg({
-                "receita_assistencial": "sum",
-                "custo_assistencial_liquido": "sum",
-                "custo_assistencial_bruto": "sum",
-                "valor_receita_faturada_fator_moderador_esp017": "sum"
-            })
-        )
+        with st.expander("⚙️ Opções de processamento", expanded=False):
+            motor_xlsx = st.selectbox(
+                "Leitor do base_12m.xlsx",
+                MOTORES_XLSX,
+                help="auto = calamine (mais rápido) quando instalado; openpyxl = leitor padrão do pandas."
+            )
+            motor_consolidacao = st.selectbox(
+                "Motor de consolidação",
+                MOTORES_CONSOLIDACAO if duckdb_disponivel() else ["pandas"],
+                help="pandas = em memória; duckdb = consulta SQL que usa todos os núcleos e grava em disco o que não couber na memória."
+            )
+            medir_memoria = st.toggle(
+                "Medir alocações por etapa no diagnóstico",
+                value=False,
+                help="Usa tracemalloc (coluna pico_mb); deixa o processamento cerca de 3x mais lento. "
+                     "Quanto cada etapa elevou o pico de memória do processo (rss_delta_mb) é medido sempre."
+            )
+        instrumentacao = Instrumentacao(medir_memoria=medir_memoria)
+
+        chave_base = hash_arquivo(base_12m)
+        chave_reaj = hash_arquivo(reajuste_file)
+        chave_usr = hash_arquivo(usr_file)
+        # Parâmetros (CM, produtos, pontos de equilíbrio) também entram na
+        # chave: mudou a tabela, o resultado salvo não vale mais
+        chave_entrada = "-".join((chave_base, chave_reaj, chave_usr, hash_parametros()))
+        chave_atual = chave_entrada
+
+        # Trocar algum arquivo cancela a tarefa em segundo plano anterior (o
+        # resultado dela não serviria mais, e o cache de etapas dela é descartado)
+        tarefa = st.session_state.get("tarefa")
+        if tarefa is not None and tarefa.chave != chave_entrada:
+            tarefa.cancelar()
+            descartar_tarefa()
+            tarefa = None
+
+        if st.session_state.get("df_corp_chave") == chave_entrada:
+            # Resultado já ativo nesta sessão (com os ajustes dela)
+            instrumentacao.registrar_cache("resultado", st.session_state["df_corp"])
+        elif tarefa is None and (df_base := cache_resultados.obter(chave_entrada)) is not None:
+            # Outra sessão já calculou: mesmo frame, sem cópia
+            instrumentacao.registrar_cache("cache_compartilhado", df_base)
+            ativar_resultado(chave_entrada, df_base)
+        elif tarefa is None and armazenamento.possui(chave_entrada):
+            # Já processado antes (inclusive antes de reiniciar o servidor):
+            # leitura indexada do df_corp salvo
+            df_base = instrumentacao.medir("armazenamento", armazenamento.carregar_resultado, chave_entrada)
+            cache_resultados.guardar(chave_entrada, df_base)
+            ativar_resultado(chave_entrada, df_base)
+        elif tarefa is None and not (df_problemas := validar_entradas(base_12m, reajuste_file, usr_file)).empty:
+            # Só os cabeçalhos (milissegundos): layout errado nem chega a
+            # iniciar o pipeline
+            chave_atual = None
+            st.error("Arquivo(s) fora do layout esperado; o processamento não foi iniciado.")
+            st.dataframe(df_problemas, use_container_width=True, hide_index=True)
+        else:
+            if tarefa is None:
+                # Arquivos novos: o pipeline roda em segundo plano e a página
+                # continua respondendo. A tarefa escreve só na própria cópia
+                # do cache de etapas (uma tarefa cancelada que ainda roda não
+                # mexe no dicionário da sessão nem no da tarefa nova)
+                st.session_state["cache_tarefa"] = dict(st.session_state.get("cache_etapas", {}))
+                tarefa = TarefaPipeline(
+                    processar_arquivos,
+                    st.session_state["cache_tarefa"],
+                    armazenamento,
+                    chave_entrada,
+                    (chave_base, chave_reaj, chave_usr),
+                    (base_12m.getvalue(), reajuste_file.getvalue(), usr_file.getvalue()),
+                    ", ".join(a.name for a in (base_12m, reajuste_file, usr_file)),
+                    motor_xlsx,
+                    motor_consolidacao,
+                    etapas=ETAPAS_PIPELINE[motor_consolidacao],
+                    chave=chave_entrada,
+                    medir_memoria=medir_memoria
+                )
+                st.session_state["tarefa"] = tarefa
+
+            if tarefa.concluida:
+                # Thread encerrada: a sessão adota o cache da tarefa, com as
+                # etapas concluídas mesmo se ela foi cancelada ou falhou
+                st.session_state["cache_etapas"] = st.session_state["cache_tarefa"]
+
+            if not tarefa.concluida:
+                chave_atual = None
+                acompanhar_tarefa(tarefa)
+            elif tarefa.cancelada or tarefa.erro is not None:
+                chave_atual = None
+                if tarefa.erro is not None:
+                    st.error(f"Falha no processamento: {tarefa.erro!r}")
+                else:
+                    st.warning("Processamento cancelado.")
+                if st.button("▶️ Processar novamente"):
+                    descartar_tarefa()
+                    st.rerun()
+            else:
+                # Entrega o resultado da tarefa à sessão
+                descartar_tarefa()
+                instrumentacao = tarefa.instrumentacao
+                cache_resultados.guardar(chave_entrada, tarefa.resultado)
+                ativar_resultado(chave_entrada, tarefa.resultado)
+
+        # Indicador de cache (hit = reaproveitado, miss = processado agora)
+        if instrumentacao.etapas:
+            st.caption("Cache: " + " · ".join(
+                f"{e['etapa']} {'✅ hit' if e['cache'] == 'hit' else '⏳ miss'}"
+                for e in instrumentacao.etapas
+            ))
+
+        # ---------- DIAGNÓSTICO POR ETAPA ----------
+        # Mostra a última execução que processou algo (reruns 100% cache não
+        # apagam as medições)
+        if any(e["cache"] == "miss" for e in instrumentacao.etapas):
+            st.session_state["diagnostico"] = instrumentacao
+        diagnostico = st.session_state.get("diagnostico", instrumentacao)
+
+        with st.expander("🩺 Diagnóstico do processamento", expanded=False):
+            df_diagnostico = diagnostico.para_dataframe()
+            st.dataframe(df_diagnostico, use_container_width=True, hide_index=True)
+            st.caption(f"Tempo somado das etapas: {df_diagnostico['segundos'].sum():.3f} s (as leituras dos arquivos rodam em paralelo)")
+            estatisticas = cache_resultados.estatisticas()
+            st.caption(
+                f"Cache compartilhado: {estatisticas['resultados']} resultado(s) · "
+                f"{estatisticas['usado_mb']:,.1f} de {estatisticas['limite_mb']:,.0f} MB · "
+                f"taxa de acerto {estatisticas['taxa_acerto']:.0%} "
+                f"({estatisticas['acertos']} acerto(s), {estatisticas['falhas']} falha(s), {estatisticas['descartes']} descarte(s))"
+            )
+            st.download_button(
+                "⬇️ Exportar diagnóstico (JSON)",
+                data=diagnostico.para_json(),
+                file_name="diagnostico_processamento.json",
+                mime="application/json"
+            )
 
-        # ---------- CSV REAJUSTE ----------
-        df_reaj = pd.read_csv(reajuste_file, sep=";", encoding="latin1")
-
-        df_reaj.columns = (
-            df_reaj.columns.str.strip().str.lower()
-            .str.replace(" ", "_")
-            .str.replace("ç", "c")
-            .str.replace("ã", "a")
-            .str.replace("á", "a")
-            .str.replace("é", "e")
-            .str.replace("í", "i")
-            .str.replace("ó", "o")
-            .str.replace("ú", "u")
-        )
+        # ---------- COBERTURA DAS JUNÇÕES ----------
+        if chave_atual is not None:
+            cobertura = st.session_state.get("cache_etapas", {}).get(("cobertura", chave_entrada))
+            with st.expander("🔗 Cobertura das junções", expanded=False):
+                if cobertura is None:
+                    st.caption("Disponível quando os arquivos são lidos nesta sessão pelo motor pandas.")
+                else:
+                    st.dataframe(
+                        cobertura,
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={
+                            "percentual_sem_par": st.column_config.NumberColumn(format="percent"),
+                        }
+                    )
 
-        df_reaj_sel = df_reaj[[
-            "codigo_contrato",
-            "empresa",
-            "total_usuarios_coletivo",
-            "total_usuarios_privativo",
-            "reajuste_financeiro"
-        ]].rename(columns={
-            "codigo_contrato": "id_contrato",
-            "reajuste_financeiro": "indice_financeiro"
-        })
-
-        # ---------- CSV USUÁRIOS (USR_MMYY) ----------
-        df_usr = pd.read_csv(usr_file, sep=";", encoding="latin1")
-
-        # Padroniza colunas
-        df_usr.columns = (
-            df_usr.columns.str.strip().str.lower()
-            .str.replace(" ", "_")
-            .str.replace("ç", "c")
-            .str.replace("ã", "a")
-            .str.replace("á", "a")
-            .str.replace("é", "e")
-            .str.replace("í", "i")
-            .str.replace("ó", "o")
-            .str.replace("ú", "u")
-        )
+    # ==================================================
+    # RESULTADO DA SESSÃO (arquivos enviados ou resultado salvo)
+    # ==================================================
+    if chave_atual is not None:
+        resultado_corporacoes(armazenamento)
+
+
+# Progresso da tarefa em segundo plano: só este fragmento reexecuta (a cada
+# meio segundo) enquanto o pipeline roda; ao terminar, um rerun completo
+# entrega o resultado à sessão
+@st.fragment(run_every=0.5)
+def acompanhar_tarefa(tarefa):
+    if tarefa.concluida:
+        st.rerun()
+
+    progresso = tarefa.progresso()
+    etapa = ", ".join(progresso["em_andamento"]) or "iniciando"
+    st.progress(
+        progresso["fracao"],
+        text=f"⏳ Processando: {etapa} · {len(set(progresso['concluidas']))} de {len(tarefa.instrumentacao.etapas_previstas)} etapas"
+    )
 
-        df_usr = df_usr[[
-            "id_corporacao_contrato",
-            "descricao_tipo_sexo",
-            "descricao_faixa_etaria_10_faixas",
-            "qtd_usuarios_ativos_ultimo_dia_competencia"
-        ]].rename(columns={
-            "id_corporacao_contrato": "id_corporacao",
-            "descricao_tipo_sexo": "sexo",
-            "descricao_faixa_etaria_10_faixas": "faixa_etaria",
-            "qtd_usuarios_ativos_ultimo_dia_competencia": "qtd_usuarios"
-        })
-
-        # ---------- NORMALIZA SEXO ----------
-        df_usr["sexo"] = (
-            df_usr["sexo"]
-            .str.upper()
-            .str.strip()
-        )
+    if not tarefa.cancelada and st.button("⛔ Cancelar processamento"):
+        tarefa.cancelar()
+    if tarefa.cancelada:
+        st.caption("Cancelando: a etapa em andamento termina (e fica no cache da sessão) e as seguintes não rodam.")
 
-        # ---------- MAPA DE FAIXA ETÁRIA ----------
-        mapa_faixa = {
-            "0 A 18": "0-18",
-            "19 A 23": "19-23",
-            "24 A 28": "24-28",
-            "29 A 33": "29-33",
-            "34 A 38": "34-38",
-            "39 A 43": "39-43",
-            "44 A 48": "44-48",
-            "49 A 53": "49-53",
-            "54 A 58": "54-58",
-            "ACIMA DE 59": "59-999"
-        }
 
-        df_usr["faixa_etaria"] = (
-            df_usr["faixa_etaria"]
-            .str.upper()
-            .str.strip()
-            .map(mapa_faixa)
+# Ajustes manuais + totais da carteira. O envio do form reexecuta só este
+# fragmento (e os de dentro: grade e cenários), já com os valores recalculados.
+@st.fragment
+def resultado_corporacoes(armazenamento):
+    # ==================================================
+    # 1. CONFIGURAÇÃO DA TABELA EDITÁVEL
+    # ==================================================
+    # Define a coluna 'motivo' como Texto e trava as outras
+    col_config = {
+        "obs": st.column_config.TextColumn(
+            "Motivo do Reajuste",
+            help="Classificação automática. Clique para editar.",
+            width="medium",
+            required=True
         )
+    }
+    # Trava todas as colunas numéricas para não serem alteradas sem querer
+    cols_travadas = [c for c in ORDEM_COLUNAS if c != "obs"]
+
+    # ==================================================
+    # 2. EXIBIÇÃO PRINCIPAL (Visualização)
+    # ==================================================
+    st.subheader("📊 Resultado por Corporação")
 
-        # Remove registros sem faixa válida
-        df_usr = df_usr.dropna(subset=["faixa_etaria"])
+    # A grade é desenhada no fim do fragmento (depois dos ajustes manuais),
+    # assim só é enviada uma vez por execução e já com os valores recalculados
+    area_resultado = st.container()
 
-        # ---------- MERGE COM BASE CM ----------
-        df_usr = df_usr.merge(
-            BASE_CM,
-            on="faixa_etaria",
-            how="left"
-        )
+    # ==================================================
+    # 3. AJUSTES MANUAIS (COM FORM)
+    # ==================================================
+    # Recupera o DataFrame COMPLETO da memória (agora já com o "obs" atualizado)
+    df_corp_full = st.session_state.get("df_corp")
 
-        # ---------- ESCOLHA DO CM POR SEXO ----------
-        df_usr["cm_utilizado"] = df_usr.apply(
-            lambda x: x["cm_masculino"]
-            if x["sexo"] == "MASCULINO"
-            else x["cm_feminino"],
-            axis=1
-        )
+    if df_corp_full is not None:
 
-        # ---------- CUSTO PROJETADO ----------
-        df_usr["custo_projetado"] = (
-            df_usr["qtd_usuarios"]
-            * df_usr["cm_utilizado"]
-            * 12
-        )
+      # 1. Cria condições lógicas separadas para ficar organizado
 
-        # ---------- AGREGA POR CORPORAÇÃO ----------
-        df_custo_proj = (
-            df_usr
-            .groupby("id_corporacao", as_index=False)
-            .agg({
-                "custo_projetado": "sum"
-            })
-        )
+      # Condição A: Contratos Grandes (>= 1000 vidas)
+      # Habilita MV independente do reajuste
 
-        # =============================
-        # RECEITA SEM REAJUSTE (CSV)
-        # =============================
-        df_reaj_receita = df_reaj[[
-            "codigo_contrato",
-            "vigente_coletivo",
-            "vigente_privativo",
-            "total_usuarios_coletivo",
-            "total_usuarios_privativo"
-        ]].rename(columns={
-            "codigo_contrato": "id_contrato"
-        })
-
-        cols_valores = [
-            "vigente_coletivo",
-            "vigente_privativo",
-            "total_usuarios_coletivo",
-            "total_usuarios_privativo"
-        ]
-
-        df_reaj_receita[cols_valores] = (
-            df_reaj_receita[cols_valores]
-            .fillna(0)
-            .astype(float)
-        )
+     condicao_grandes = (df_corp_full["vidas"] >= 1000) 
 
-        df_reaj_receita["receita_sem_reajuste"] = 12 * ((
-            df_reaj_receita["vigente_coletivo"]
-            * df_reaj_receita["total_usuarios_coletivo"]
-        ) + (
-            df_reaj_receita["vigente_privativo"]
-            * df_reaj_receita["total_usuarios_privativo"]
-        ))
-
-        df_reaj_sel["vidas"] = (
-            df_reaj_sel["total_usuarios_coletivo"].fillna(0)
-            + df_reaj_sel["total_usuarios_privativo"].fillna(0)
-        )
+     #Condição B: Contratos Médios com Reajuste Alto (>= 200 vidas E Meta >= 15%)
+     # Habilita MV e Expurgo
 
-        df_reaj_sel["indice_financeiro"] = df_reaj_sel["indice_financeiro"] / 100
+     condicao_critica = (df_corp_full["vidas"] >= 200) & (df_corp_full["reajuste_meta"] >= 0.15)   
 
-        contrato_corp = df_base_sel[["id_contrato", "id_corporacao"]].drop_duplicates()
+     # 2. Combina as condições (Lógica OU)
+     # A empresa é elegível para aparecer na tabela se atender A OU B
 
-        df_reaj_receita = df_reaj_receita.merge(
-            contrato_corp,
-            on="id_contrato",
-            how="inner"
-        )
+     df_corp_full["elegivel_ajuste"] = condicao_grandes | condicao_critica
 
-        df_receita_corp = (
-            df_reaj_receita
-            .groupby("id_corporacao", as_index=False)
-            .agg({
-                "receita_sem_reajuste": "sum"
-            })
-        )
+     # 3. Filtra o DataFrame para edição
+     df_ajustes_base = df_corp_full.loc[
+        df_corp_full["elegivel_ajuste"],
+        ["id_corporacao", "empresa", "vidas", "reajuste_meta", "ajuste_mv", "expurgo"]
+     ].copy() # Adicionei 'vidas' e 'meta' para você conferir visualmente na hora de editar
 
-        df_reaj_corp = (
-            df_reaj_sel
-            .merge(contrato_corp, on="id_contrato", how="inner")
-            .groupby("id_corporacao", as_index=False)
-            .agg({
-                "empresa": "first",
-                "vidas": "sum",
-                "indice_financeiro": "mean"
-            })
-        )
+     st.subheader("✏️ Ajustes Manuais (MV e Expurgo)")
 
-        df_reaj_corp["ponto_equilibrio"] = df_reaj_corp["vidas"].apply(obter_ponto_equilibrio)
+     # Atualiza a legenda para refletir a nova regra complexa
+     st.info("""
+    **Regras de Exibição:**
+    * **Ajuste MV:** Liberado para contratos com **≥ 1000 vidas** (qualquer reajuste) **OU** contratos com **≥ 200 vidas e Meta ≥ 15%**.
+    * **Expurgo:** Aplicável somente para contratos com **≥ 200 vidas e Meta ≥ 15%**.
+    """)
 
-        # ---------- MERGE FINAL ----------
-        df_corp = df_base_corp.merge(df_reaj_corp, on="id_corporacao", how="inner")
 
-        df_corp = df_corp.merge(
-            df_receita_corp,
-            on="id_corporacao",
-            how="left"
-        )
-        df_corp = df_corp.merge(
-            df_custo_proj,
-            on="id_corporacao",
-            how="left"
-        )
 
-         # ... (código anterior de merges e preparação) ...
+        # # Usa o df completo para calcular elegibilidade
+        # df_corp_full["elegivel_ajuste"] = (
+        #     (df_corp_full["reajuste_meta"] >= 0.15) &
+        #     (df_corp_full["vidas"] >= 200)
+        # )
 
-        df_corp["ajuste_mv"] = 0.0
-        df_corp["expurgo"] = 0.0
+        # df_ajustes_base = df_corp_full.loc[
+        #     df_corp_full["elegivel_ajuste"],
+        #     ["id_corporacao", "empresa", "ajuste_mv", "expurgo"]
+        # ].copy()
 
-         # 1. Calcula os reajustes iniciais
-        df_corp = recalcular_reajustes(df_corp)
-    
-       # ---------------------------------------------------------
-       # CORREÇÃO 1: SALVAR O DATAFRAME COMPLETO (SEM FILTRAR)
-       # ---------------------------------------------------------
-     
-        st.session_state["df_corp"] = df_corp.copy()
+        # st.subheader("✏️ Ajustes Manuais (MV e Expurgo)")
+        # st.caption("Somente corporações com reajuste meta ≥ 15% e ≥ 200 vidas.")
+    cols_bloqueadas = [col for col in df_ajustes_base.columns if col not in ["ajuste_mv", "expurgo"]]
 
-    
-       # ==================================================
-        # 1. CONFIGURAÇÃO DA TABELA EDITÁVEL
-        # ==================================================
-        # Define a coluna 'motivo' como Texto e trava as outras
-        col_config = {
-            "obs": st.column_config.TextColumn(
-                "Motivo do Reajuste",
-                help="Classificação automática. Clique para editar.",
-                width="medium",
-                required=True
+    with st.form("form_ajustes"):
+            df_ajustes = st.data_editor(
+                df_ajustes_base,
+                num_rows="fixed",
+                use_container_width=True,
+                disabled=cols_bloqueadas,
+                hide_index=True
             )
+            submitted = st.form_submit_button("🔄 Recalcular com Ajustes Manuais")
+
+    if submitted:
+            # Detecta só as corporações com MV/Expurgo alterados no editor
+            cols_ajuste = ["ajuste_mv", "expurgo"]
+            df_editado = df_ajustes[cols_ajuste].fillna(df_ajustes_base[cols_ajuste])
+            alterados = df_editado.ne(df_ajustes_base[cols_ajuste]).any(axis=1)
+
+            # ---------------------------------------------------------
+            # RECALCULAR APENAS AS LINHAS ALTERADAS (IN PLACE)
+            # ---------------------------------------------------------
+            if alterados.any():
+                # Vira um lote no histórico (só os valores que mudaram)
+                ajustes = st.session_state["historico_ajustes"].aplicar(df_corp_full, df_editado[alterados])
+                st.session_state.pop("cubo_cenarios", None)
+                armazenamento.salvar_ajustes(st.session_state["df_corp_chave"], ajustes)
+                st.success(f"Reajustes recalculados com sucesso ✅ ({int(alterados.sum())} corporação(ões) alterada(s))")
+            else:
+                st.info("Nenhum ajuste alterado.")
+
+    # ---------- HISTÓRICO (DESFAZER / REFAZER) ----------
+    historico = st.session_state["historico_ajustes"]
+    h1, h2, h3 = st.columns([1, 1, 4])
+    h1.button("↩️ Desfazer", on_click=navegar_historico, args=("desfazer",), disabled=not historico.pode_desfazer)
+    h2.button("↪️ Refazer", on_click=navegar_historico, args=("refazer",), disabled=not historico.pode_refazer)
+    h3.caption(f"Histórico de ajustes: {historico.posicao} de {len(historico.lotes)} envio(s) aplicado(s)")
+
+    if historico.lotes:
+        with st.expander("⚖️ Comparar ajustes (cenário A × B)", expanded=False):
+            comparar_ajustes()
+
+    # ==================================================
+    # 4. TOTAIS E GRADE PAGINADA (filtro/ordenação no servidor)
+    # ==================================================
+    with area_resultado:
+        df_resultado = st.session_state["df_corp"]
+
+        # Totais da carteira inteira, independentes dos filtros
+        resumo = resumir_carteira(df_resultado)
+        m1, m2, m3, m4, m5, m6 = st.columns(6)
+        m1.metric("Corporações", f"{resumo['corporacoes']:,}")
+        m2.metric("Vidas", f"{resumo['vidas']:,.0f}")
+        m3.metric("Receita assistencial", f"R$ {resumo['receita_assistencial']:,.0f}")
+        m4.metric("Sinistralidade", f"{resumo['sinistralidade']:.2%}")
+        m5.metric("Reajuste meta (pond. vidas)", f"{resumo['reajuste_meta']:.2%}")
+        m6.metric("Com aporte", f"{resumo['com_aporte']:,}")
+
+        grade_resultado()
+
+    # ==================================================
+    # 5. CENÁRIOS (ponto de equilíbrio × índice financeiro)
+    # ==================================================
+    with st.expander("🎯 Simulação de cenários (ponto de equilíbrio × índice)", expanded=False):
+        simulacao_cenarios()
+
+
+# Desfazer / refazer reaplicam um lote do histórico nas corporações dele.
+# Rodam como callback (antes do fragmento), então o editor e a grade já são
+# montados com os valores reaplicados.
+def navegar_historico(acao):
+    historico = st.session_state["historico_ajustes"]
+    ajustes = getattr(historico, acao)(st.session_state["df_corp"])
+    if ajustes is not None:
+        obter_armazenamento().salvar_ajustes(st.session_state["df_corp_chave"], ajustes)
+        st.session_state.pop("cubo_cenarios", None)
+
+
+# Dois pontos do histórico lado a lado, só nas corporações ajustadas
+@st.fragment
+def comparar_ajustes():
+    historico = st.session_state["historico_ajustes"]
+    df_resumo = historico.resumo()
+    rotulos = {0: "Resultado aberto (sem os envios desta sessão)"}
+    rotulos.update({
+        int(linha.lote): f"Após o envio {linha.lote} ({linha.alteracoes} alteração(ões))"
+        for linha in df_resumo.itertuples()
+    })
+
+    c1, c2 = st.columns(2)
+    posicao_a = c1.selectbox("Cenário A", list(rotulos), index=0, format_func=rotulos.get)
+    posicao_b = c2.selectbox("Cenário B", list(rotulos), index=historico.posicao, format_func=rotulos.get)
+
+    st.dataframe(
+        historico.comparar(st.session_state["df_corp"], posicao_a, posicao_b),
+        use_container_width=True,
+        column_config={
+            col: st.column_config.NumberColumn(format="percent")
+            for col in ["reajuste_meta_a", "reajuste_comercial_a", "reajuste_meta_b",
+                        "reajuste_comercial_b", "diferenca_reajuste_comercial"]
         }
-        # Trava todas as colunas numéricas para não serem alteradas sem querer
-        cols_travadas = [c for c in ORDEM_COLUNAS if c != "obs"]
+    )
 
-        # ==================================================
-        # 2. EXIBIÇÃO PRINCIPAL (Visualização)
-        # ==================================================
-        st.subheader("📊 Resultado por Corporação")
-        
-        # Como não precisa editar, usamos o dataframe simples
-        st.dataframe(
-            df_corp[ORDEM_COLUNAS],
-            use_container_width=True,
-            hide_index=True
-        )
 
-        # ==================================================
-        # 3. AJUSTES MANUAIS (COM FORM)
-        # ==================================================
-        # Recupera o DataFrame COMPLETO da memória (agora já com o "obs" atualizado)
-        df_corp_full = st.session_state.get("df_corp")
+# Filtros, ordenação e paginação: reexecutam só a grade
+@st.fragment
+def grade_resultado():
+    df_resultado = st.session_state["df_corp"]
+
+    f1, f2, f3, f4, f5 = st.columns([2, 1, 2, 1, 2])
+    filtro_obs = f1.multiselect("Motivo (obs)", opcoes_obs(df_resultado))
+    filtro_aporte = f2.selectbox("Aporte", ["Todos", "S", "N"])
+    vidas_teto = max(int(np.nan_to_num(df_resultado["vidas"].max())), 1)
+    faixa_vidas = f3.slider("Vidas", 0, vidas_teto, (0, vidas_teto))
+    meta_min = f4.number_input("Meta mínima (%)", value=None, step=1.0, placeholder="—")
+    busca = f5.text_input("Buscar empresa / id")
+
+    o1, o2, o3, o4 = st.columns([2, 1, 1, 1])
+    ordenar_por = o1.selectbox("Ordenar por", ORDEM_COLUNAS, index=ORDEM_COLUNAS.index("vidas"))
+    crescente = o2.toggle("Crescente", value=False)
+    tamanho_pagina = o3.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1)
+    pagina = o4.number_input("Página", min_value=1, value=1, step=1)
+
+    mascara = filtrar_corporacoes(
+        df_resultado,
+        obs=filtro_obs,
+        ind_aporte=None if filtro_aporte == "Todos" else filtro_aporte,
+        vidas_min=faixa_vidas[0] if faixa_vidas[0] > 0 else None,
+        vidas_max=faixa_vidas[1] if faixa_vidas[1] < vidas_teto else None,
+        reajuste_meta_min=None if meta_min is None else meta_min / 100,
+        busca=busca
+    )
+    df_pagina, total_paginas = paginar_corporacoes(
+        df_resultado,
+        ORDEM_COLUNAS,
+        mascara=mascara,
+        ordenar_por=ordenar_por,
+        crescente=crescente,
+        pagina=pagina,
+        tamanho_pagina=tamanho_pagina
+    )
 
-        if df_corp_full is not None:
-   
-          # 1. Cria condições lógicas separadas para ficar organizado
-        
-          # Condição A: Contratos Grandes (>= 1000 vidas)
-          # Habilita MV independente do reajuste
-         
-         condicao_grandes = (df_corp_full["vidas"] >= 1000) 
-         
-         #Condição B: Contratos Médios com Reajuste Alto (>= 200 vidas E Meta >= 15%)
-         # Habilita MV e Expurgo
-         
-         condicao_critica = (df_corp_full["vidas"] >= 200) & (df_corp_full["reajuste_meta"] >= 0.15)   
-         
-         # 2. Combina as condições (Lógica OU)
-         # A empresa é elegível para aparecer na tabela se atender A OU B
-         
-         df_corp_full["elegivel_ajuste"] = condicao_grandes | condicao_critica
-         
-         # 3. Filtra o DataFrame para edição
-         df_ajustes_base = df_corp_full.loc[
-            df_corp_full["elegivel_ajuste"],
-            ["id_corporacao", "empresa", "vidas", "reajuste_meta", "ajuste_mv", "expurgo"]
-         ].copy() # Adicionei 'vidas' e 'meta' para você conferir visualmente na hora de editar
-
-         st.subheader("✏️ Ajustes Manuais (MV e Expurgo)")
-         
-         # Atualiza a legenda para refletir a nova regra complexa
-         st.info("""
-        **Regras de Exibição:**
-        * **Ajuste MV:** Liberado para contratos com **≥ 1000 vidas** (qualquer reajuste) **OU** contratos com **≥ 200 vidas e Meta ≥ 15%**.
-        * **Expurgo:** Aplicável somente para contratos com **≥ 200 vidas e Meta ≥ 15%**.
-        """)
+    st.dataframe(df_pagina, use_container_width=True, hide_index=True)
+    st.caption(
+        f"Página {min(int(pagina), total_paginas)} de {total_paginas} · "
+        f"{int(mascara.sum()):,} de {len(df_resultado):,} corporações no filtro"
+    )
 
-         
-         
-            # # Usa o df completo para calcular elegibilidade
-            # df_corp_full["elegivel_ajuste"] = (
-            #     (df_corp_full["reajuste_meta"] >= 0.15) &
-            #     (df_corp_full["vidas"] >= 200)
-            # )
-
-            # df_ajustes_base = df_corp_full.loc[
-            #     df_corp_full["elegivel_ajuste"],
-            #     ["id_corporacao", "empresa", "ajuste_mv", "expurgo"]
-            # ].copy()
-
-            # st.subheader("✏️ Ajustes Manuais (MV e Expurgo)")
-            # st.caption("Somente corporações com reajuste meta ≥ 15% e ≥ 200 vidas.")
-        cols_bloqueadas = [col for col in df_ajustes_base.columns if col not in ["ajuste_mv", "expurgo"]]
-
-        with st.form("form_ajustes"):
-                df_ajustes = st.data_editor(
-                    df_ajustes_base,
-                    num_rows="fixed",
-                    use_container_width=True,
-                    disabled=cols_bloqueadas,
-                    hide_index=True
-                )
-                submitted = st.form_submit_button("🔄 Recalcular com Ajustes Manuais")
-
-        if submitted:
-                # Faz o merge no DataFrame COMPLETO
-                df_corp_full = df_corp_full.merge(
-                    df_ajustes,
-                    on=["id_corporacao", "empresa"],
-                    how="left",
-                    suffixes=("", "_edit")
-                )
+    # ---------- EXPORTAÇÃO ----------
+    # O arquivo só é gerado no clique, gravado em blocos. O Streamlit guarda
+    # o arquivo pronto inteiro em memória para servir o download; o que se
+    # evita é uma cópia convertida do df_corp inteiro ao mesmo tempo.
+    e1, e2 = st.columns([1, 3])
+    formato_exportacao = e1.selectbox("Formato", formatos_disponiveis(), key="formato_exportacao")
+
+    # O download adiado só aceita str, bytes ou BytesIO (não arquivo temporário)
+    def gerar_exportacao():
+        arquivo = io.BytesIO()
+        exportar_df_corp(df_resultado, arquivo, formato_exportacao)
+        return arquivo
+
+    extensao, mime = FORMATOS_EXPORTACAO[formato_exportacao]
+    e2.download_button(
+        "⬇️ Exportar resultado completo (todas as colunas)",
+        data=gerar_exportacao,
+        file_name=f"reajustes_corporacao{extensao}",
+        mime=mime,
+        help="CSV em latin1, como os arquivos de origem: caractere fora do latin1 sai como \"?\". "
+             "XLSX e Parquet mantêm o texto original." if formato_exportacao == "csv" else None
+    )
 
-                # Atualiza valores de MV e Expurgo
-                df_corp_full["ajuste_mv"] = df_corp_full["ajuste_mv_edit"].fillna(df_corp_full["ajuste_mv"])
-                df_corp_full["expurgo"] = df_corp_full["expurgo_edit"].fillna(df_corp_full["expurgo"])
 
-                df_corp_full.drop(
-                    columns=["ajuste_mv_edit", "expurgo_edit"],
-                    inplace=True
-                )
+@st.fragment
+def simulacao_cenarios():
+    df_cenarios = st.session_state["df_corp"]
 
-                # ---------------------------------------------------------
-                # RECALCULAR COM A BASE COMPLETA
-                # ---------------------------------------------------------
-                # Nota: Não rodamos a classificação de "obs" aqui para não
-                # sobrescrever o que você acabou de editar manualmente na tabela de cima.
-                df_corp_full = recalcular_reajustes(df_corp_full)
-                
-                # Salva o resultado no session state
-                st.session_state["df_corp"] = df_corp_full.copy()
-
-                st.success("Reajustes recalculados com sucesso ✅")
-                
-                # Exibe a tabela final atualizada (apenas visualização)
-                st.dataframe(
-                    df_corp_full[ORDEM_COLUNAS],
-                    use_container_width=True,
-                    hide_index=True
-                )
+    c1, c2, c3 = st.columns([2, 2, 1])
+    pontos_cenario = c1.multiselect(
+        "Pontos de equilíbrio",
+        [round(p, 2) for p in np.arange(0.70, 0.905, 0.01)],
+        default=PONTOS_EQUILIBRIO_PADRAO
+    )
+    faixa_indice = c2.slider("Índice financeiro (%)", 0.0, 20.0, (0.0, 10.0), step=0.5)
+    passo_indice = c3.number_input("Passo do índice (%)", min_value=0.1, value=1.0, step=0.1)
+
+    indices_cenario = np.arange(faixa_indice[0], faixa_indice[1] + passo_indice / 2, passo_indice) / 100
+    celulas = len(df_cenarios) * len(pontos_cenario) * len(indices_cenario)
+    st.caption(
+        f"{len(df_cenarios):,} corporações × {len(pontos_cenario)} pontos × {len(indices_cenario)} índices "
+        f"≈ {estimar_mb_cenarios(len(df_cenarios), len(pontos_cenario), len(indices_cenario)):,.0f} MB"
+    )
+
+    if not pontos_cenario:
+        st.info("Escolha ao menos um ponto de equilíbrio.")
+    elif celulas > LIMITE_CELULAS_CENARIOS:
+        st.warning("Grade grande demais para esta carteira: reduza os pontos ou aumente o passo do índice.")
+    else:
+        # O cubo fica na sessão: trocar a métrica ou a corporação não refaz a conta
+        chave_cubo = (st.session_state["df_corp_chave"], tuple(sorted(pontos_cenario)), tuple(indices_cenario))
+        cache_cubo = st.session_state.get("cubo_cenarios")
+        if cache_cubo is None or cache_cubo[0] != chave_cubo:
+            cubo = calcular_cenarios(df_cenarios, sorted(pontos_cenario), indices_cenario)
+            cache_cubo = (chave_cubo, cubo, resumir_cenarios(cubo, df_cenarios))
+            st.session_state["cubo_cenarios"] = cache_cubo
+        _, cubo, df_resumo = cache_cubo
+
+        metrica = st.radio(
+            "Mapa de calor",
+            ["reajuste_comercial", "receita_adicional"],
+            format_func={
+                "reajuste_comercial": "Reajuste comercial médio (pond. vidas)",
+                "receita_adicional": "Receita adicional (R$)",
+            }.get,
+            horizontal=True
+        )
+        mapa = alt.Chart(df_resumo).mark_rect().encode(
+            x=alt.X("indice_financeiro:O", title="Índice financeiro", axis=alt.Axis(format=".1%")),
+            y=alt.Y("ponto_equilibrio:O", title="Ponto de equilíbrio", axis=alt.Axis(format=".0%")),
+            color=alt.Color(f"{metrica}:Q", title=None),
+            tooltip=[
+                alt.Tooltip("ponto_equilibrio:Q", format=".0%"),
+                alt.Tooltip("indice_financeiro:Q", format=".1%"),
+                alt.Tooltip("reajuste_comercial:Q", format=".2%"),
+                alt.Tooltip("receita_adicional:Q", format=",.0f"),
+            ]
+        )
+        st.altair_chart(mapa, use_container_width=True)
+
+        # Detalhe de uma corporação: grade completa de reajuste comercial. O id
+        # é digitado e conferido com o cubo (uma lista com todos os ids iria
+        # inteira para o navegador)
+        id_cenario = st.number_input(
+            "Corporação", min_value=0, value=None, step=1, placeholder="id da corporação a detalhar"
+        )
+        if id_cenario is not None:
+            try:
+                detalhe = cenarios_corporacao(cubo, id_cenario)
+            except KeyError:
+                st.warning(f"Corporação {id_cenario} não está no resultado.")
+            else:
+                st.dataframe(detalhe.style.format("{:.2%}"), use_container_width=True)
+
+
+with tab_arquivos:
+    aba_arquivos()
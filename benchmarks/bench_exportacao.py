@@ -0,0 +1,96 @@
+"""Tempo, pico de memória e tamanho da exportação do df_corp por formato.
+
+Compara a gravação em blocos (precos.exportacao) com a chamada direta do
+pandas (to_csv / to_excel / to_parquet) sobre um df_corp com N linhas.
+
+Exemplo:
+    python -m benchmarks.bench_exportacao --linhas 100k
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from precos import calcular_df_corp
+from precos.exportacao import EXPORTADORES, colunas_exportacao, formatos_disponiveis
+
+from .bench_pipeline import PASTA_BASELINES, interpretar_tamanho, preparar_dados
+
+
+def df_corp_sintetico(linhas):
+    # Carteira de 100k contratos repetida até o nº de linhas pedido
+    caminhos = preparar_dados(100_000, "100k")
+    df = calcular_df_corp(caminhos["base_12m"], caminhos["reajuste"], caminhos["usr"])
+    df = df.iloc[np.resize(np.arange(len(df)), linhas)].reset_index(drop=True)
+    return df[colunas_exportacao(df)]
+
+
+def exportar_pandas(df, caminho, formato):
+    if formato == "csv":
+        df.to_csv(caminho, sep=";", encoding="latin1", errors="replace", index=False)
+    elif formato == "xlsx":
+        df.to_excel(caminho, index=False)
+    else:
+        df.to_parquet(caminho, index=False)
+
+
+def medir(funcao, *args, repeticoes=1):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao(*args)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return melhor, pico / 1024 ** 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de exportação do df_corp.")
+    parser.add_argument("--linhas", default="100k", help="linhas do df_corp exportado (ex.: 100k)")
+    parser.add_argument("--formatos", nargs="+", default=formatos_disponiveis())
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--salvar", action="store_true",
+                        help="grava o resultado em benchmarks/baselines/exportacao.json")
+    args = parser.parse_args(argv)
+
+    df = df_corp_sintetico(interpretar_tamanho(args.linhas))
+    colunas = list(df.columns)
+    print(f"df_corp: {len(df)} linhas x {len(colunas)} colunas")
+
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for formato in args.formatos:
+            caminho = Path(pasta) / f"saida.{formato}"
+            linha = {"formato": formato, "linhas": len(df)}
+
+            segundos, pico = medir(EXPORTADORES[formato], df, caminho, colunas, repeticoes=args.repeticoes)
+            linha.update(blocos_seg=round(segundos, 3), blocos_pico_mb=round(pico, 1))
+            linha["mb"] = round(caminho.stat().st_size / 1024 ** 2, 2)
+
+            segundos, pico = medir(exportar_pandas, df, caminho, formato, repeticoes=args.repeticoes)
+            linha.update(pandas_seg=round(segundos, 3), pandas_pico_mb=round(pico, 1))
+
+            linhas.append(linha)
+
+    resultado = pd.DataFrame(linhas)
+    print(resultado.to_string(index=False))
+
+    if args.salvar:
+        PASTA_BASELINES.mkdir(exist_ok=True)
+        destino = PASTA_BASELINES / "exportacao.json"
+        destino.write_text(json.dumps(linhas, indent=2) + "\n")
+        print(f"Resultado gravado em {destino}")
+
+
+if __name__ == "__main__":
+    main()
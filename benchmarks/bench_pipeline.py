@@ -0,0 +1,194 @@
+"""Benchmark do pipeline arquivo -> df_corp em carteiras sintéticas.
+
+Mede tempo (melhor de N execuções) e pico de memória (tracemalloc) de cada
+etapa e compara com as baselines gravadas em benchmarks/baselines/.
+
+Exemplos:
+    python -m benchmarks.bench_pipeline --tamanhos 10k 100k
+    python -m benchmarks.bench_pipeline --tamanhos 10k --salvar-baseline
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from precos import (
+    classificar_motivos,
+    consolidar_corporacoes,
+    etapas_em_paralelo,
+    processar_base_12m,
+    processar_reajuste,
+    processar_usr,
+    recalcular_reajustes,
+)
+
+from .sintetico import gravar_carteira, nomes_arquivos
+
+PASTA_BASELINES = Path(__file__).parent / "baselines"
+PASTA_DADOS = Path(__file__).parent / ".dados"
+
+# Diferenças abaixo disso (s / MB) são ruído e nunca contam como regressão
+FOLGA_SEGUNDOS = 0.05
+FOLGA_MB = 5.0
+
+
+def interpretar_tamanho(texto):
+    multiplicadores = {"k": 1_000, "m": 1_000_000}
+    sufixo = texto[-1].lower()
+    if sufixo in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[sufixo])
+    return int(texto)
+
+
+def preparar_dados(contratos, rotulo):
+    # Reaproveita a carteira já gerada para o mesmo tamanho
+    pasta = PASTA_DADOS / rotulo
+    caminhos = {chave: pasta / nome for chave, nome in nomes_arquivos().items()}
+    if not all(c.exists() for c in caminhos.values()):
+        print(f"Gerando carteira sintética de {rotulo} contratos em {pasta} ...")
+        caminhos = gravar_carteira(pasta, contratos)
+    return caminhos
+
+
+# =============================
+# EXECUÇÃO DAS ETAPAS
+# =============================
+# A leitura de cada arquivo já faz parse + padronização das colunas (e, no
+# usr, a pré-agregação por bloco), por isso é medida por arquivo.
+def executar_etapas(caminhos, medir_memoria=False):
+    resultados = {}
+
+    def medir(etapa, funcao, *args):
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        saida = funcao(*args)
+        segundos = time.perf_counter() - inicio
+        pico = 0
+        if medir_memoria:
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        resultados[etapa] = {
+            "segundos": segundos,
+            "pico_mb": pico / 1024 ** 2,
+            "linhas": sum(map(len, saida)) if isinstance(saida, list) else len(saida),
+        }
+        return saida
+
+    # As três leituras ao mesmo tempo, como no calcular_df_corp (tempo de parede)
+    def ler_em_paralelo():
+        with etapas_em_paralelo(None, max_workers=3) as submeter:
+            leituras = [
+                submeter("base_12m", processar_base_12m, caminhos["base_12m"]),
+                submeter("reajuste", processar_reajuste, caminhos["reajuste"]),
+                submeter("usr", processar_usr, caminhos["usr"]),
+            ]
+            return [leitura.result() for leitura in leituras]
+
+    df_base = medir("leitura_base_12m", processar_base_12m, caminhos["base_12m"])
+    df_reaj = medir("leitura_reajuste", processar_reajuste, caminhos["reajuste"])
+    df_custo = medir("leitura_usr", processar_usr, caminhos["usr"])
+    medir("leitura_paralela", ler_em_paralelo)
+    df_corp = medir("consolidacao", consolidar_corporacoes, df_base, df_reaj, df_custo)
+    df_corp = medir("recalcular_reajustes", recalcular_reajustes, df_corp)
+    medir("classificacao", classificar_motivos, df_corp)
+
+    return resultados
+
+
+def medir_pipeline(caminhos, repeticoes):
+    tempos = [executar_etapas(caminhos) for _ in range(repeticoes)]
+    memoria = executar_etapas(caminhos, medir_memoria=True)
+
+    return {
+        etapa: {
+            "segundos": min(t[etapa]["segundos"] for t in tempos),
+            "pico_mb": memoria[etapa]["pico_mb"],
+            "linhas": memoria[etapa]["linhas"],
+        }
+        for etapa in memoria
+    }
+
+
+# =============================
+# BASELINES
+# =============================
+def caminho_baseline(rotulo):
+    return PASTA_BASELINES / f"pipeline_{rotulo}.json"
+
+
+def comparar_com_baseline(etapas, baseline, tolerancia):
+    regressoes = []
+    for etapa, atual in etapas.items():
+        anterior = baseline["etapas"].get(etapa)
+        if anterior is None:
+            continue
+        for metrica, folga in (("segundos", FOLGA_SEGUNDOS), ("pico_mb", FOLGA_MB)):
+            limite = anterior[metrica] * (1 + tolerancia) + folga
+            if atual[metrica] > limite:
+                regressoes.append(
+                    f"{etapa}.{metrica}: {atual[metrica]:.3f} > {anterior[metrica]:.3f} (+{tolerancia:.0%})"
+                )
+    return regressoes
+
+
+def imprimir_tabela(rotulo, etapas, baseline):
+    print(f"\n== {rotulo} contratos ==")
+    print(f"{'etapa':<22}{'seg':>10}{'base seg':>10}{'pico MB':>10}{'base MB':>10}{'linhas':>10}")
+    for etapa, atual in etapas.items():
+        anterior = (baseline or {}).get("etapas", {}).get(etapa, {})
+        print(
+            f"{etapa:<22}{atual['segundos']:>10.3f}{anterior.get('segundos', np.nan):>10.3f}"
+            f"{atual['pico_mb']:>10.1f}{anterior.get('pico_mb', np.nan):>10.1f}{atual['linhas']:>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do pipeline de reajustes.")
+    parser.add_argument("--tamanhos", nargs="+", default=["10k", "100k", "1M"],
+                        help="quantidade de contratos (ex.: 10k 100k 1M)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="aumento relativo aceito antes de acusar regressão")
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="grava o resultado como nova baseline")
+    args = parser.parse_args(argv)
+
+    houve_regressao = False
+
+    for rotulo in args.tamanhos:
+        contratos = interpretar_tamanho(rotulo)
+        caminhos = preparar_dados(contratos, rotulo)
+        etapas = medir_pipeline(caminhos, args.repeticoes)
+
+        arquivo_baseline = caminho_baseline(rotulo)
+        baseline = json.loads(arquivo_baseline.read_text()) if arquivo_baseline.exists() else None
+        imprimir_tabela(rotulo, etapas, baseline)
+
+        if args.salvar_baseline:
+            PASTA_BASELINES.mkdir(exist_ok=True)
+            arquivo_baseline.write_text(json.dumps({
+                "contratos": contratos,
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "etapas": etapas,
+            }, indent=2) + "\n")
+            print(f"Baseline gravada em {arquivo_baseline}")
+        elif baseline:
+            regressoes = comparar_com_baseline(etapas, baseline, args.tolerancia)
+            for regressao in regressoes:
+                print(f"REGRESSÃO {rotulo}: {regressao}")
+            houve_regressao |= bool(regressoes)
+
+    return 1 if houve_regressao else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
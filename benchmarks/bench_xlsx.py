@@ -0,0 +1,70 @@
+"""Tempo de leitura do base_12m.xlsx por tamanho de arquivo e leitor.
+
+Compara a leitura original (openpyxl, todas as colunas) com a leitura só
+das colunas do esquema em cada motor disponível.
+
+Exemplo:
+    python -m benchmarks.bench_xlsx --tamanhos 10k 50k 100k
+"""
+import argparse
+import importlib.util
+import json
+import time
+
+import pandas as pd
+
+from precos import processar_base_12m
+
+from .bench_pipeline import PASTA_BASELINES, interpretar_tamanho, preparar_dados
+
+
+def ler_original(caminho):
+    return pd.read_excel(caminho)
+
+
+def cronometrar(funcao, *args, repeticoes=3, **kwargs):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args, **kwargs)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de leitura do base_12m.xlsx.")
+    parser.add_argument("--tamanhos", nargs="+", default=["10k", "50k", "100k"])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--salvar", action="store_true",
+                        help="grava o resultado em benchmarks/baselines/xlsx.json")
+    args = parser.parse_args(argv)
+
+    variantes = {
+        "original_openpyxl": lambda c: ler_original(c),
+        "openpyxl_colunas": lambda c: processar_base_12m(c, motor="openpyxl"),
+    }
+    if importlib.util.find_spec("python_calamine") is not None:
+        variantes["calamine_colunas"] = lambda c: processar_base_12m(c, motor="calamine")
+    else:
+        print("python-calamine não instalado: pulando o motor calamine")
+
+    linhas = []
+    for rotulo in args.tamanhos:
+        caminho = preparar_dados(interpretar_tamanho(rotulo), rotulo)["base_12m"]
+        linha = {"tamanho": rotulo, "mb": round(caminho.stat().st_size / 1024 ** 2, 2)}
+        for nome, funcao in variantes.items():
+            linha[nome] = round(cronometrar(funcao, caminho, repeticoes=args.repeticoes), 3)
+        linhas.append(linha)
+
+    resultado = pd.DataFrame(linhas)
+    print(resultado.to_string(index=False))
+
+    if args.salvar:
+        PASTA_BASELINES.mkdir(exist_ok=True)
+        destino = PASTA_BASELINES / "xlsx.json"
+        destino.write_text(json.dumps(linhas, indent=2) + "\n")
+        print(f"Resultado gravado em {destino}")
+
+
+if __name__ == "__main__":
+    main()
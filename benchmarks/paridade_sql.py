@@ -0,0 +1,131 @@
+"""Paridade e tempo: consolidação pandas x DuckDB (precos.consolidacao_sql).
+
+Roda os dois caminhos sobre as carteiras sintéticas e compara coluna a
+coluna o df_corp final (tolerância relativa nas colunas numéricas: as somas
+do DuckDB são paralelas e podem diferir na última casa). Além das carteiras
+do --tamanhos, roda sempre uma carteira pequena com os casos de borda: uma
+corporação com todas as quantidades do usr em branco (custo 0, não nulo) e
+empresas diferentes entre os contratos da mesma corporação (vale a primeira
+do arquivo). Sai com código 1 se alguma coluna divergir.
+
+Exemplo:
+    python -m benchmarks.paridade_sql --tamanhos 10k 100k
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from precos import calcular_df_corp
+from precos.consolidacao_sql import calcular_df_corp_sql, duckdb_disponivel
+
+from .bench_pipeline import interpretar_tamanho, preparar_dados
+from .sintetico import gerar_carteira
+
+
+def comparar(esperado, obtido, rtol):
+    divergencias = []
+    if list(esperado.columns) != list(obtido.columns):
+        return [f"colunas diferentes: {list(esperado.columns)} x {list(obtido.columns)}"]
+    if len(esperado) != len(obtido):
+        return [f"linhas: {len(esperado)} x {len(obtido)}"]
+
+    for col in esperado.columns:
+        a = esperado[col].reset_index(drop=True)
+        b = obtido[col].reset_index(drop=True)
+        if a.dtype.kind in "fi":
+            iguais = np.isclose(a.to_numpy(dtype="float64"), b.to_numpy(dtype="float64"), rtol=rtol, atol=0, equal_nan=True)
+        else:
+            iguais = (a.fillna("").astype(str) == b.fillna("").astype(str)).to_numpy()
+        if not iguais.all():
+            divergencias.append(f"{col}: {int((~iguais).sum())} linha(s) diferentes")
+    return divergencias
+
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+# Carteira pequena com os casos de borda; devolve os caminhos e a corporação
+# sem quantidades no usr
+def gravar_casos_borda(diretorio, contratos=300):
+    diretorio = Path(diretorio)
+    df_base, df_reaj, df_usr = gerar_carteira(contratos, semente=1)
+
+    # Uma empresa por contrato: a consolidação fica com a primeira do arquivo
+    df_reaj["empresa"] = [f"EMPRESA {c}" for c in df_reaj["codigo_contrato"]]
+    df_reaj = df_reaj.sample(frac=1, random_state=1)
+
+    # Corporação com reajuste mas todas as quantidades do usr em branco
+    corp_nan = df_base.loc[df_base["id_contrato"].isin(df_reaj["codigo_contrato"]), "id_corporacao"].iloc[0]
+    df_usr["qtd_usuarios_ativos_ultimo_dia_competencia"] = df_usr["qtd_usuarios_ativos_ultimo_dia_competencia"].astype("float64")
+    df_usr.loc[df_usr["id_corporacao_contrato"] == corp_nan, "qtd_usuarios_ativos_ultimo_dia_competencia"] = np.nan
+
+    caminhos = {
+        "base_12m": diretorio / "base_12m.xlsx",
+        "reajuste": diretorio / "reajuste.csv",
+        "usr": diretorio / "usr.csv",
+    }
+    df_base.to_excel(caminhos["base_12m"], index=False)
+    df_reaj.to_csv(caminhos["reajuste"], sep=";", encoding="latin1", index=False)
+    df_usr.to_csv(caminhos["usr"], sep=";", encoding="latin1", index=False)
+    return caminhos, corp_nan
+
+
+def verificar(rotulo, caminhos, args):
+    arquivos = (caminhos["base_12m"], caminhos["reajuste"], caminhos["usr"])
+
+    df_pandas, seg_pandas = cronometrar(calcular_df_corp, *arquivos)
+    df_sql, seg_sql = cronometrar(
+        calcular_df_corp_sql, *arquivos,
+        limite_memoria=args.limite_memoria, threads=args.threads
+    )
+
+    divergencias = comparar(df_pandas, df_sql, args.rtol)
+    situacao = "OK" if not divergencias else "DIVERGENTE"
+    print(f"{rotulo:>6}: {len(df_pandas)} corporações | pandas {seg_pandas:.3f} s | duckdb {seg_sql:.3f} s | {situacao}")
+    for divergencia in divergencias:
+        print(f"        {divergencia}")
+    return df_pandas, df_sql, divergencias
+
+
+def verificar_casos_borda(args):
+    with tempfile.TemporaryDirectory(prefix="paridade_sql_") as pasta:
+        caminhos, corp_nan = gravar_casos_borda(pasta)
+        df_pandas, df_sql, divergencias = verificar("borda", caminhos, args)
+
+    for rotulo, df in (("pandas", df_pandas), ("duckdb", df_sql)):
+        custo = df.loc[df["id_corporacao"] == corp_nan, "custo_projetado"]
+        if len(custo) != 1 or custo.iloc[0] != 0.0:
+            divergencias.append(f"{rotulo}: custo_projetado da corporação {corp_nan} sem quantidades = {custo.tolist()} (esperado [0.0])")
+            print(f"        {divergencias[-1]}")
+    return divergencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paridade da consolidação pandas x DuckDB.")
+    parser.add_argument("--tamanhos", nargs="*", default=["10k", "100k"], help="vazio: só os casos de borda")
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--limite-memoria", default="4GB")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if not duckdb_disponivel():
+        print("duckdb não instalado: pip install duckdb", file=sys.stderr)
+        return 2
+
+    falhou = bool(verificar_casos_borda(args))
+    for rotulo in args.tamanhos:
+        caminhos = preparar_dados(interpretar_tamanho(rotulo), rotulo)
+        falhou |= bool(verificar(rotulo, caminhos, args)[2])
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
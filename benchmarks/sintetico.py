@@ -0,0 +1,130 @@
+"""Gerador de carteiras sintéticas com o mesmo layout dos arquivos reais.
+
+Exemplo:
+    python -m benchmarks.sintetico --contratos 100000 --saida dados/100k
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FAIXAS_USR = [
+    "0 a 18", "19 a 23", "24 a 28", "29 a 33", "34 a 38",
+    "39 a 43", "44 a 48", "49 a 53", "54 a 58", "Acima de 59"
+]
+
+
+# =============================
+# NOMES DOS ARQUIVOS
+# =============================
+def nomes_arquivos(competencia="10/2025"):
+    mes, ano = competencia.split("/")
+    return {
+        "base_12m": "base_12m.xlsx",
+        "reajuste": f"Reajuste_{mes}{ano}.csv",
+        "usr": f"usr_{mes}{ano[-2:]}.csv",
+    }
+
+
+# =============================
+# GERAÇÃO DA CARTEIRA
+# =============================
+# O tamanho das corporações segue uma lei de potência (assimetria > 0):
+# poucas corporações concentram muitos contratos, como na carteira real.
+def gerar_carteira(contratos, corporacoes=None, assimetria=1.1, cobertura_reajuste=0.95, semente=0):
+    rng = np.random.default_rng(semente)
+    corporacoes = corporacoes or max(1, contratos // 3)
+
+    pesos = 1.0 / np.arange(1, corporacoes + 1) ** assimetria
+    id_contrato = np.arange(1, contratos + 1)
+    id_corporacao = rng.choice(corporacoes, size=contratos, p=pesos / pesos.sum()) + 1
+
+    # Vidas por contrato (log-normal) e valores proporcionais às vidas
+    vidas = np.maximum(1, rng.lognormal(2.5, 1.2, contratos).astype(np.int64))
+    receita = vidas * rng.uniform(3_000, 9_000, contratos)
+    custo_bruto = receita * rng.uniform(0.4, 1.3, contratos)
+    fator_moderador = custo_bruto * rng.uniform(0.0, 0.08, contratos)
+
+    df_base = pd.DataFrame({
+        "id_contrato": id_contrato,
+        "id_corporacao": id_corporacao,
+        "nome_contrato": [f"CONTRATO {i}" for i in id_contrato],
+        "receita_assistencial": receita.round(2),
+        "custo_assistencial_liquido": (custo_bruto - fator_moderador).round(2),
+        "custo_assistencial_bruto": custo_bruto.round(2),
+        "valor_receita_faturada_fator_moderador_esp017": fator_moderador.round(2),
+        "qtd_meses": 12,
+    })
+
+    # Nem todo contrato da base aparece no arquivo de reajuste
+    no_reajuste = rng.random(contratos) < cobertura_reajuste
+    coletivo = np.round(vidas * rng.uniform(0.7, 1.0, contratos))
+    df_reaj = pd.DataFrame({
+        "codigo_contrato": id_contrato,
+        "empresa": [f"EMPRESA {c}" for c in id_corporacao],
+        "data_aniversario": "01/10/2025",
+        "total_usuarios_coletivo": coletivo,
+        "total_usuarios_privativo": vidas - coletivo,
+        "reajuste_financeiro": rng.choice([3.9, 4.5, 5.1], contratos),
+        "vigente_coletivo": rng.uniform(250, 900, contratos).round(2),
+        "vigente_privativo": rng.uniform(250, 900, contratos).round(2),
+    })[no_reajuste]
+
+    # usr: uma linha por contrato x sexo x faixa etária com usuários ativos
+    linhas = np.repeat(np.arange(contratos), 20)
+    sexo = np.tile(np.repeat(["MASCULINO", "FEMININO"], 10), contratos)
+    faixa = np.tile(np.array(FAIXAS_USR * 2), contratos)
+    qtd = rng.poisson(np.repeat(vidas / 20.0, 20))
+    ativo = qtd > 0
+
+    df_usr = pd.DataFrame({
+        "id_corporacao_contrato": id_corporacao[linhas][ativo],
+        "id_contrato": id_contrato[linhas][ativo],
+        "descricao_tipo_sexo": sexo[ativo],
+        "descricao_faixa_etaria_10_faixas": faixa[ativo],
+        "qtd_usuarios_ativos_ultimo_dia_competencia": qtd[ativo],
+    })
+
+    return df_base, df_reaj, df_usr
+
+
+def gravar_carteira(diretorio, contratos, competencia="10/2025", **opcoes):
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    df_base, df_reaj, df_usr = gerar_carteira(contratos, **opcoes)
+    nomes = nomes_arquivos(competencia)
+    caminhos = {chave: diretorio / nome for chave, nome in nomes.items()}
+
+    df_base.to_excel(caminhos["base_12m"], index=False)
+    df_reaj.to_csv(caminhos["reajuste"], sep=";", encoding="latin1", index=False)
+    df_usr.to_csv(caminhos["usr"], sep=";", encoding="latin1", index=False)
+
+    return caminhos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera base_12m, Reajuste e usr sintéticos.")
+    parser.add_argument("--contratos", type=int, default=10_000)
+    parser.add_argument("--corporacoes", type=int, default=None, help="padrão: contratos / 3")
+    parser.add_argument("--assimetria", type=float, default=1.1, help="expoente da lei de potência")
+    parser.add_argument("--competencia", default="10/2025", help="MM/AAAA")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", default="dados_sinteticos")
+    args = parser.parse_args(argv)
+
+    caminhos = gravar_carteira(
+        args.saida,
+        args.contratos,
+        competencia=args.competencia,
+        corporacoes=args.corporacoes,
+        assimetria=args.assimetria,
+        semente=args.semente
+    )
+    for caminho in caminhos.values():
+        print(caminho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Motor de cálculo do Ecossistema de Preços, independente da interface Streamlit."""
+from .agregacao import COLUNAS_SOMA_BASE, consolidar_corporacoes, expandir_contratos
+from .armazenamento import ARQUIVO_ARMAZENAMENTO_PADRAO, ArmazenamentoResultados
+from .cache_resultados import LIMITE_CACHE_MB_PADRAO, CacheResultados, tamanho_mb
+from .calculo import (
+    COLUNAS_CALCULADAS,
+    ORDEM_COLUNAS,
+    recalcular_corporacoes,
+    recalcular_reajustes,
+)
+from .cenarios import (
+    LIMITE_CELULAS_CENARIOS,
+    PONTOS_EQUILIBRIO_PADRAO,
+    CuboCenarios,
+    calcular_cenarios,
+    cenarios_corporacao,
+    estimar_mb_cenarios,
+    resumir_cenarios,
+)
+from .consolidacao_sql import (
+    LIMITE_MEMORIA_SQL_PADRAO,
+    MOTORES_CONSOLIDACAO,
+    calcular_df_corp_sql,
+    consolidar_corporacoes_sql,
+    duckdb_disponivel,
+)
+from .consulta import (
+    TAMANHOS_PAGINA,
+    filtrar_corporacoes,
+    opcoes_obs,
+    paginar_corporacoes,
+    resumir_carteira,
+)
+from .cotacao import (
+    PERCENTUAL_FIXO_MARGEM,
+    fatores_produto,
+    precificar,
+    precificar_cotacao,
+    precificar_cotacoes,
+    processar_cotacoes,
+)
+from .esquemas import ESQUEMA_BASE_12M, ESQUEMA_COTACAO, ESQUEMA_REAJUSTE, ESQUEMA_USR
+from .exportacao import (
+    EXPORTADORES,
+    FORMATOS_EXPORTACAO,
+    TAMANHO_BLOCO_EXPORTACAO,
+    colunas_exportacao,
+    exportar_csv,
+    exportar_df_corp,
+    exportar_parquet,
+    exportar_xlsx,
+    formatos_disponiveis,
+)
+from .ingestao import (
+    COLUNAS_USR,
+    MOTOR_XLSX_PADRAO,
+    MOTORES_XLSX,
+    TAMANHO_BLOCO_USR,
+    calcular_df_corp,
+    custo_projetado_por_corporacao,
+    ler_csv_esquema,
+    ler_xlsx_esquema,
+    montar_df_corp,
+    padronizar_colunas,
+    processar_base_12m,
+    processar_reajuste,
+    processar_usr,
+    resolver_motor_xlsx,
+)
+from .historico import CAMPOS_AJUSTE, HistoricoAjustes, calcular_deltas, reproduzir_lote
+from .instrumentacao import Instrumentacao, etapas_em_paralelo, executar_etapa
+from .parametros import (
+    BASE_CM,
+    CODIGOS_PRODUTO,
+    FATORES_PRODUTO,
+    LIMITES_VIDAS_PE,
+    MAPA_FAIXA,
+    MATRIZ_CM,
+    PONTOS_EQUILIBRIO,
+    PRODUTOS_PARAMETROS,
+    SEXO_FEMININO,
+    SEXO_MASCULINO,
+    MatrizCM,
+    compilar_matriz_cm,
+    hash_parametros,
+    obter_ponto_equilibrio,
+    pontos_equilibrio,
+)
+from .regras import REGRAS_OBS, ROTULOS_OBS, classificar_motivos
+from .tarefas import InstrumentacaoTarefa, TarefaCancelada, TarefaPipeline
+from .validacao import (
+    ENTRADAS,
+    descrever_problemas,
+    ler_cabecalho,
+    relatorio_cobertura,
+    validar_cabecalho,
+    validar_entradas,
+)
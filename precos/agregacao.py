@@ -0,0 +1,136 @@
+"""Consolidação contrato -> corporação com códigos inteiros.
+
+O vínculo contrato/corporação do base_12m é fatorado uma vez; todas as
+somas, médias e o "first" por corporação saem de np.bincount sobre esses
+códigos, sem merges nem DataFrames intermediários.
+"""
+import numpy as np
+import pandas as pd
+
+from .parametros import pontos_equilibrio
+
+# Colunas do base_12m somadas por corporação
+COLUNAS_SOMA_BASE = [
+    "receita_assistencial",
+    "custo_assistencial_liquido",
+    "custo_assistencial_bruto",
+    "valor_receita_faturada_fator_moderador_esp017",
+]
+
+
+def _somar(codigos, valores, tamanho):
+    # Soma por código ignorando NaN (como o groupby.sum)
+    return np.bincount(codigos, weights=np.nan_to_num(valores, nan=0.0), minlength=tamanho)
+
+
+def _float(serie):
+    return serie.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def expandir_contratos(contratos_base, corp_base, contratos_reaj):
+    # Para cada linha do reajuste, devolve (linha, código da corporação) de
+    # todos os pares contrato/corporação distintos do base_12m — o mesmo que
+    # o merge inner com contrato_corp, na ordem das linhas do arquivo
+    codigos, _ = pd.factorize(
+        pd.concat([pd.Series(contratos_base), pd.Series(contratos_reaj)], ignore_index=True)
+    )
+    contrato_base = codigos[:len(contratos_base)]
+    contrato_reaj = codigos[len(contratos_base):]
+
+    # Par (contrato, corporação) em uma única chave int64 ordenável
+    valido = (contrato_base >= 0) & (corp_base >= 0)
+    base_corp = np.int64(max(corp_base.max(initial=0), 0) + 1)
+    chaves = np.unique(contrato_base[valido].astype("int64") * base_corp + corp_base[valido])
+    par_contrato = chaves // base_corp
+    par_corp = chaves % base_corp
+
+    inicio = np.searchsorted(par_contrato, contrato_reaj, side="left")
+    fim = np.searchsorted(par_contrato, contrato_reaj, side="right")
+    quantidade = fim - inicio
+
+    linhas = np.repeat(np.arange(len(contrato_reaj)), quantidade)
+    deslocamento = np.arange(quantidade.sum()) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+
+    return linhas, par_corp[np.repeat(inicio, quantidade) + deslocamento]
+
+
+# Agrega e junta as três entradas em uma linha por corporação, sem o cálculo
+def consolidar_corporacoes(df_base_sel, df_reaj, df_custo_proj):
+    # ---------- CÓDIGOS DE CORPORAÇÃO (ordenados, como o groupby) ----------
+    corp_base, corporacoes = pd.factorize(df_base_sel["id_corporacao"], sort=True)
+    total = len(corporacoes)
+    valido = corp_base >= 0
+
+    somas_base = {
+        col: _somar(corp_base[valido], _float(df_base_sel[col])[valido], total)
+        for col in COLUNAS_SOMA_BASE
+    }
+
+    # ---------- REAJUSTE -> CORPORAÇÃO ----------
+    linhas, corp_reaj = expandir_contratos(
+        df_base_sel["id_contrato"].to_numpy(),
+        corp_base,
+        df_reaj["codigo_contrato"].to_numpy()
+    )
+
+    coletivo = np.nan_to_num(_float(df_reaj["total_usuarios_coletivo"]))
+    privativo = np.nan_to_num(_float(df_reaj["total_usuarios_privativo"]))
+
+    # =============================
+    # RECEITA SEM REAJUSTE (CSV)
+    # =============================
+    receita_sem_reajuste = 12 * ((
+        np.nan_to_num(_float(df_reaj["vigente_coletivo"])) * coletivo
+    ) + (
+        np.nan_to_num(_float(df_reaj["vigente_privativo"])) * privativo
+    ))
+
+    vidas = coletivo + privativo
+    indice = _float(df_reaj["reajuste_financeiro"]) / 100
+
+    # ---------- AGREGA POR CORPORAÇÃO ----------
+    qtd_reaj = np.bincount(corp_reaj, minlength=total)
+
+    indice_linha = indice[linhas]
+    tem_indice = ~np.isnan(indice_linha)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indice_corp = (
+            np.bincount(corp_reaj[tem_indice], weights=indice_linha[tem_indice], minlength=total)
+            / np.bincount(corp_reaj[tem_indice], minlength=total)
+        )
+
+    # "first": primeira empresa não nula de cada corporação, na ordem do arquivo
+    empresa_linha = df_reaj["empresa"].to_numpy(dtype=object)[linhas]
+    tem_empresa = pd.notna(empresa_linha)
+    corp_com_empresa, primeira = np.unique(corp_reaj[tem_empresa], return_index=True)
+    empresa_corp = np.full(total, np.nan, dtype=object)
+    empresa_corp[corp_com_empresa] = empresa_linha[tem_empresa][primeira]
+
+    # ---------- MERGE FINAL ----------
+    # Só corporações presentes no base_12m e no reajuste (antes: merge inner)
+    manter = qtd_reaj > 0
+    ids = corporacoes[manter]
+
+    # Corporação sem usr (ou usr vazio) fica com custo NaN
+    custo_ids = pd.Index(df_custo_proj["id_corporacao"]).get_indexer(ids)
+    tem_custo = custo_ids >= 0
+    custo_projetado = np.full(len(ids), np.nan)
+    custo_projetado[tem_custo] = _float(df_custo_proj["custo_projetado"])[custo_ids[tem_custo]]
+
+    vidas_corp = _somar(corp_reaj, vidas[linhas], total)[manter]
+
+    df_corp = pd.DataFrame({
+        "id_corporacao": ids,
+        **{col: valores[manter] for col, valores in somas_base.items()},
+        "empresa": pd.array(empresa_corp[manter], dtype=df_reaj["empresa"].dtype),
+        "vidas": vidas_corp,
+        "indice_financeiro": indice_corp[manter],
+        "ponto_equilibrio": pontos_equilibrio(vidas_corp),
+        "receita_sem_reajuste": _somar(corp_reaj, receita_sem_reajuste[linhas], total)[manter],
+        "custo_projetado": custo_projetado,
+    })
+
+    df_corp["ajuste_mv"] = 0.0
+    df_corp["expurgo"] = 0.0
+
+    return df_corp
@@ -0,0 +1,150 @@
+"""Armazenamento local (SQLite) dos resultados e dos ajustes manuais.
+
+Cada processamento fica gravado pela chave das entradas (hash dos três
+arquivos): o df_corp calculado vai para a tabela corporacoes e os ajustes
+de MV/expurgo ficam numa camada à parte (ajustes), aplicada na leitura.
+Reabrir um resultado é uma leitura indexada por chave, sem refazer o
+pipeline.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .calculo import recalcular_corporacoes
+
+ARQUIVO_ARMAZENAMENTO_PADRAO = Path(
+    os.environ.get("PRECOS_ARMAZENAMENTO", ".armazenamento/resultados.sqlite")
+)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    chave TEXT PRIMARY KEY,
+    criado_em TEXT NOT NULL,
+    arquivos TEXT,
+    linhas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ajustes (
+    chave TEXT NOT NULL,
+    id_corporacao INTEGER NOT NULL,
+    ajuste_mv REAL NOT NULL,
+    expurgo REAL NOT NULL,
+    atualizado_em TEXT NOT NULL,
+    PRIMARY KEY (chave, id_corporacao)
+);
+"""
+
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ArmazenamentoResultados:
+    # Uma conexão por operação: pode ser compartilhado entre sessões/threads
+    def __init__(self, caminho=ARQUIVO_ARMAZENAMENTO_PADRAO):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conectar()) as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(_ESQUEMA)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho)
+
+    # =============================
+    # RESULTADOS
+    # =============================
+    def possui(self, chave):
+        with closing(self._conectar()) as conexao:
+            linha = conexao.execute("SELECT 1 FROM resultados WHERE chave = ?", (chave,)).fetchone()
+        return linha is not None
+
+    def salvar_resultado(self, chave, df_corp, arquivos=None):
+        # Substitui o df_corp da chave; os ajustes já gravados são mantidos
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+            if self._tem_tabela(conexao, "corporacoes"):
+                conexao.execute("DELETE FROM corporacoes WHERE chave = ?", (chave,))
+
+            df_corp.assign(chave=chave).to_sql("corporacoes", conexao, if_exists="append", index=False)
+            conexao.execute("CREATE INDEX IF NOT EXISTS ix_corporacoes_chave ON corporacoes (chave)")
+            conexao.execute(
+                "INSERT INTO resultados (chave, criado_em, arquivos, linhas) VALUES (?, ?, ?, ?)",
+                (chave, _agora(), arquivos, len(df_corp))
+            )
+
+    def carregar(self, chave):
+        # df_corp indexado por id_corporacao (como na sessão), já com os ajustes
+        return self.aplicar_ajustes(chave, self.carregar_resultado(chave))
+
+    def carregar_resultado(self, chave):
+        # df_corp como foi calculado, sem a camada de ajustes
+        with closing(self._conectar()) as conexao:
+            df_corp = pd.read_sql_query(
+                "SELECT * FROM corporacoes WHERE chave = ?", conexao, params=(chave,)
+            ).drop(columns="chave")
+
+        if df_corp.empty:
+            raise KeyError(f"Resultado {chave!r} não está no armazenamento")
+
+        return df_corp.set_index("id_corporacao", drop=False)
+
+    def listar(self):
+        with closing(self._conectar()) as conexao:
+            return pd.read_sql_query(
+                "SELECT r.chave, r.criado_em, r.arquivos, r.linhas, COUNT(a.id_corporacao) AS ajustes "
+                "FROM resultados r LEFT JOIN ajustes a ON a.chave = r.chave "
+                "GROUP BY r.chave ORDER BY r.criado_em DESC",
+                conexao
+            )
+
+    def remover(self, chave):
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+            conexao.execute("DELETE FROM ajustes WHERE chave = ?", (chave,))
+            if self._tem_tabela(conexao, "corporacoes"):
+                conexao.execute("DELETE FROM corporacoes WHERE chave = ?", (chave,))
+
+    # =============================
+    # AJUSTES MANUAIS (MV / EXPURGO)
+    # =============================
+    # ajustes: indexado por id_corporacao, com as colunas ajuste_mv e expurgo
+    def carregar_ajustes(self, chave):
+        with closing(self._conectar()) as conexao:
+            return pd.read_sql_query(
+                "SELECT id_corporacao, ajuste_mv, expurgo FROM ajustes WHERE chave = ?",
+                conexao, params=(chave,), index_col="id_corporacao"
+            )
+
+    # Altera df_corp no lugar (recalcula só as corporações ajustadas)
+    def aplicar_ajustes(self, chave, df_corp):
+        ajustes = self.carregar_ajustes(chave)
+        ajustes = ajustes[ajustes.index.isin(df_corp.index)]
+        if not ajustes.empty:
+            recalcular_corporacoes(df_corp, ajustes)
+        return df_corp
+
+    def salvar_ajustes(self, chave, ajustes):
+        agora = _agora()
+        linhas = [
+            (chave, int(id_corporacao), float(mv), float(expurgo), agora)
+            for id_corporacao, mv, expurgo in zip(ajustes.index, ajustes["ajuste_mv"], ajustes["expurgo"])
+        ]
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.executemany(
+                "INSERT INTO ajustes (chave, id_corporacao, ajuste_mv, expurgo, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (chave, id_corporacao) DO UPDATE SET "
+                "ajuste_mv = excluded.ajuste_mv, expurgo = excluded.expurgo, "
+                "atualizado_em = excluded.atualizado_em",
+                linhas
+            )
+
+    @staticmethod
+    def _tem_tabela(conexao, nome):
+        return conexao.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)
+        ).fetchone() is not None
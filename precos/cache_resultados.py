@@ -0,0 +1,77 @@
+"""Cache em memória dos df_corp calculados, compartilhado pelo processo.
+
+Uma entrada por chave (hash dos três arquivos + hash dos parâmetros). Tem
+orçamento de memória: quando passa do limite, os resultados usados há mais
+tempo saem primeiro (LRU). Os frames guardados não devem ser alterados; cada
+sessão trabalha numa cópia rasa (copy-on-write), então analistas com a mesma
+carteira dividem as mesmas colunas até alguém aplicar um ajuste.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+LIMITE_CACHE_MB_PADRAO = float(os.environ.get("PRECOS_CACHE_MB", 1024))
+
+
+def tamanho_mb(df):
+    return float(df.memory_usage(index=True, deep=True).sum()) / 1024 ** 2
+
+
+class CacheResultados:
+    # Protegido por lock: o mesmo objeto atende todas as sessões do servidor
+    def __init__(self, limite_mb=LIMITE_CACHE_MB_PADRAO):
+        self.limite_mb = limite_mb
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+    def guardar(self, chave, df_corp):
+        mb = tamanho_mb(df_corp)
+        with self._lock:
+            self._entradas.pop(chave, None)
+            # Maior que o orçamento inteiro: não guarda (nem derruba os outros)
+            if mb > self.limite_mb:
+                return
+            self._entradas[chave] = (df_corp, mb)
+            while self._usado_mb() > self.limite_mb:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+
+    def remover(self, chave):
+        with self._lock:
+            self._entradas.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def _usado_mb(self):
+        return sum(mb for _, mb in self._entradas.values())
+
+    # =============================
+    # MÉTRICAS
+    # =============================
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "resultados": len(self._entradas),
+                "usado_mb": self._usado_mb(),
+                "limite_mb": self.limite_mb,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
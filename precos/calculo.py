@@ -0,0 +1,122 @@
+"""Recálculo dos reajustes por corporação."""
+import numpy as np
+
+from .regras import _numerico, classificar_motivos
+
+# =============================
+# FUNÇÃO CENTRAL DE RECÁLCULO
+# =============================
+def _sem_zero(valores):
+    # Zero vira NaN (antes: .replace(0, pd.NA)), sem sair de float64
+    return np.where(valores == 0, np.nan, valores)
+
+
+def recalcular_reajustes(df):
+    # Todas as contas em arrays float64; divisões por zero viram NaN/inf como
+    # no pandas e np.fmax ignora NaN, igual ao .max(axis=1) com o índice financeiro
+    liquido = _numerico(df["custo_assistencial_liquido"])
+    receita = _numerico(df["receita_assistencial"])
+    bruto = _numerico(df["custo_assistencial_bruto"])
+    fator_moderador = _numerico(df["valor_receita_faturada_fator_moderador_esp017"])
+    custo_projetado = _numerico(df["custo_projetado"])
+    receita_sem_reajuste = _numerico(df["receita_sem_reajuste"])
+    indice = _numerico(df["indice_financeiro"])
+    ponto_equilibrio = _numerico(df["ponto_equilibrio"])
+    custo_ajustado = liquido - _numerico(df["ajuste_mv"]) - _numerico(df["expurgo"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sinistralidade = liquido / receita
+
+        fatmodproj = (_sem_zero(fator_moderador) / _sem_zero(bruto)) * custo_projetado
+
+        reaj_preco = np.fmax(
+            (
+                (_sem_zero(custo_projetado) - _sem_zero(fatmodproj))
+                / _sem_zero(receita_sem_reajuste)
+            ) / 0.75 - 1,
+            indice
+        )
+
+        var_cm = (_sem_zero(bruto) / _sem_zero(custo_projetado)) - 1
+
+        reajuste_meta = np.fmax(
+            (custo_ajustado / receita / 0.75) * (1 + indice) - 1,
+            indice
+        )
+
+        reajuste_comercial = np.fmax(
+            (custo_ajustado / receita / ponto_equilibrio) * (1 + indice) - 1,
+            indice
+        )
+
+    # Cópia rasa: as colunas de entrada não são duplicadas
+    df = df.copy(deep=False)
+
+    df["sinistralidade"] = sinistralidade
+    df["fatmodproj"] = fatmodproj
+    df["reaj_preco"] = reaj_preco
+    df["var_cm"] = var_cm
+    df["reajuste_meta"] = reajuste_meta
+    df["reajuste_comercial"] = reajuste_comercial
+
+    df["obs"] = classificar_motivos(df)
+    
+    df["ind_aporte"] = np.where(ponto_equilibrio != 0.75, "S", "N")
+
+    return df
+
+
+# Colunas produzidas por recalcular_reajustes
+COLUNAS_CALCULADAS = [
+    "sinistralidade",
+    "fatmodproj",
+    "reaj_preco",
+    "var_cm",
+    "reajuste_meta",
+    "reajuste_comercial",
+    "obs",
+    "ind_aporte"
+]
+
+# =============================
+# RECÁLCULO INCREMENTAL
+# =============================
+# df_corp indexado por id_corporacao; ajustes traz só as linhas editadas
+# (mesmo índice) com as novas colunas ajuste_mv/expurgo.
+def recalcular_corporacoes(df_corp, ajustes):
+    ids = ajustes.index
+
+    df_corp.loc[ids, ["ajuste_mv", "expurgo"]] = ajustes[["ajuste_mv", "expurgo"]]
+
+    df_parcial = recalcular_reajustes(df_corp.loc[ids])
+    df_corp.loc[ids, COLUNAS_CALCULADAS] = df_parcial[COLUNAS_CALCULADAS]
+
+    return df_corp
+
+
+# =============================
+# ORDEM DAS COLUNAS
+# =============================
+ORDEM_COLUNAS = [
+    "id_corporacao",
+    "empresa",
+    "vidas",
+    "receita_assistencial",
+    "custo_assistencial_liquido",
+    "ajuste_mv",
+    "expurgo",
+    "sinistralidade",
+    "indice_financeiro",
+    "ponto_equilibrio",
+    "reajuste_meta",
+    "reajuste_comercial",
+    "reaj_preco",
+    "var_cm",
+    "obs",
+    "ind_aporte"
+    ]
+
+# "valor_receita_faturada_fator_moderador_esp017",
+# "custo_assistencial_bruto",
+# "receita_sem_reajuste",
+# "custo_projetado"
@@ -0,0 +1,109 @@
+"""Simulação de cenários: ponto de equilíbrio × índice financeiro.
+
+Aplica as fórmulas de reajuste_meta / reajuste_comercial do
+recalcular_reajustes a todas as corporações de uma vez, por broadcasting.
+O cubo de saída tem corporações × pontos × índices valores float64; as
+contas são feitas direto nele (out=), então o pico de memória é o próprio
+cubo mais uma matriz corporações × pontos.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .regras import _numerico
+
+# reajuste_meta: corporações × índices (o divisor é sempre 0.75)
+# reajuste_comercial: corporações × pontos de equilíbrio × índices
+CuboCenarios = namedtuple(
+    "CuboCenarios",
+    ["ids", "pontos_equilibrio", "indices", "reajuste_meta", "reajuste_comercial"]
+)
+
+PONTOS_EQUILIBRIO_PADRAO = [0.75, 0.78, 0.80, 0.82]
+
+# Acima disso a interface pede uma grade menor (~200 MB de float64)
+LIMITE_CELULAS_CENARIOS = 25_000_000
+
+
+def estimar_mb_cenarios(corporacoes, pontos, indices):
+    # Cubo + matriz auxiliar corporações × pontos + reajuste_meta
+    return corporacoes * (pontos * indices + pontos + indices) * 8 / 1024 ** 2
+
+
+# =============================
+# CUBO DE CENÁRIOS
+# =============================
+def calcular_cenarios(df, pontos_equilibrio, indices):
+    pontos = np.asarray(pontos_equilibrio, dtype="float64")
+    indices = np.asarray(indices, dtype="float64")
+
+    liquido = _numerico(df["custo_assistencial_liquido"])
+    receita = _numerico(df["receita_assistencial"])
+    custo_ajustado = liquido - _numerico(df["ajuste_mv"]) - _numerico(df["expurgo"])
+
+    # Mesma ordem de operações do recalcular_reajustes (resultado idêntico
+    # quando a grade coincide com os valores da corporação)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razao = custo_ajustado / receita
+
+        reajuste_meta = np.multiply.outer(razao / 0.75, 1 + indices)
+        np.subtract(reajuste_meta, 1, out=reajuste_meta)
+        np.fmax(reajuste_meta, indices, out=reajuste_meta)
+
+        por_ponto = razao[:, None] / pontos
+        reajuste_comercial = np.empty((len(razao), len(pontos), len(indices)))
+        np.multiply(por_ponto[:, :, None], 1 + indices, out=reajuste_comercial)
+        np.subtract(reajuste_comercial, 1, out=reajuste_comercial)
+        np.fmax(reajuste_comercial, indices, out=reajuste_comercial)
+
+    return CuboCenarios(
+        df["id_corporacao"].to_numpy(),
+        pontos,
+        indices,
+        reajuste_meta,
+        reajuste_comercial
+    )
+
+
+# =============================
+# RESUMOS
+# =============================
+# Uma linha por cenário: reajuste comercial médio ponderado por vidas e
+# receita adicional (receita_assistencial × reajuste). Percorre um ponto de
+# equilíbrio por vez para não criar outro cubo do mesmo tamanho.
+def resumir_cenarios(cubo, df):
+    vidas = np.nan_to_num(_numerico(df["vidas"]))[:, None]
+    receita = np.nan_to_num(_numerico(df["receita_assistencial"]))[:, None]
+
+    linhas = []
+    for p, ponto in enumerate(cubo.pontos_equilibrio):
+        fatia = cubo.reajuste_comercial[:, p, :]
+        valido = np.isfinite(fatia)
+        fatia = np.where(valido, fatia, 0.0)
+        peso = (vidas * valido).sum(axis=0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = (fatia * vidas).sum(axis=0) / peso
+
+        linhas.append(pd.DataFrame({
+            "ponto_equilibrio": ponto,
+            "indice_financeiro": cubo.indices,
+            "reajuste_comercial": media,
+            "receita_adicional": (fatia * receita).sum(axis=0),
+        }))
+
+    return pd.concat(linhas, ignore_index=True)
+
+
+# Grade ponto de equilíbrio × índice de uma corporação
+def cenarios_corporacao(cubo, id_corporacao):
+    posicao = np.flatnonzero(cubo.ids == id_corporacao)
+    if len(posicao) == 0:
+        raise KeyError(f"Corporação {id_corporacao} não está no cubo de cenários")
+
+    return pd.DataFrame(
+        cubo.reajuste_comercial[posicao[0]],
+        index=pd.Index(cubo.pontos_equilibrio, name="ponto_equilibrio"),
+        columns=pd.Index(cubo.indices, name="indice_financeiro")
+    )
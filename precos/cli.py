@@ -0,0 +1,170 @@
+"""Linha de comando para recalcular reajustes em lote, sem a interface Streamlit.
+
+Exemplos:
+    python -m precos calcular base_12m.xlsx Reajuste_102025.csv usr_1025.csv -o resultado.csv
+    python -m precos lote arquivos/ -o resultado_lote.csv --workers 4
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from .calculo import ORDEM_COLUNAS
+from .consolidacao_sql import LIMITE_MEMORIA_SQL_PADRAO, MOTORES_CONSOLIDACAO, calcular_df_corp_sql
+from .exportacao import EXPORTADORES
+from .ingestao import MOTOR_XLSX_PADRAO, MOTORES_XLSX, calcular_df_corp
+from .instrumentacao import Instrumentacao, executar_etapa
+from .lote import descobrir_trios, processar_lote
+from .validacao import descrever_problemas, validar_entradas
+
+
+# =============================
+# GRAVAÇÃO DO RESULTADO
+# =============================
+# Formato pela extensão; CSV no mesmo formato dos arquivos de origem
+def salvar_resultado(df, caminho):
+    caminho = Path(caminho)
+    formato = {".xlsx": "xlsx", ".parquet": "parquet"}.get(caminho.suffix.lower(), "csv")
+
+    EXPORTADORES[formato](df, caminho, list(df.columns))
+
+
+# =============================
+# COMANDOS
+# =============================
+def comando_calcular(args):
+    # Só os cabeçalhos: layout errado falha antes do parse completo
+    df_problemas = validar_entradas(args.base_12m, args.reajuste, args.usr)
+    if not df_problemas.empty:
+        print(f"Arquivos fora do layout esperado: {descrever_problemas(df_problemas)}", file=sys.stderr)
+        return 1
+
+    instrumentacao = Instrumentacao(medir_memoria=args.medir_alocacoes) if args.diagnostico else None
+    if args.motor_consolidacao == "duckdb":
+        df_corp = executar_etapa(
+            instrumentacao, "consolidacao_sql",
+            calcular_df_corp_sql, args.base_12m, args.reajuste, args.usr,
+            limite_memoria=args.limite_memoria,
+            threads=args.threads,
+            motor_xlsx=args.motor_xlsx
+        )
+    else:
+        df_corp = calcular_df_corp(
+            args.base_12m, args.reajuste, args.usr,
+            instrumentacao=instrumentacao,
+            motor_xlsx=args.motor_xlsx
+        )
+
+    if instrumentacao is not None:
+        Path(args.diagnostico).write_text(instrumentacao.para_json(), encoding="utf-8")
+
+    colunas = list(df_corp.columns) if args.todas_colunas else ORDEM_COLUNAS
+    salvar_resultado(df_corp[colunas], args.saida)
+
+    print(f"{len(df_corp)} corporações gravadas em {args.saida}")
+    return 0
+
+
+def comando_lote(args):
+    trios = descobrir_trios(args.diretorio)
+    if not trios:
+        print(f"Nenhum trio de arquivos encontrado em {args.diretorio}", file=sys.stderr)
+        return 1
+
+    df_lote, falhas = processar_lote(
+        trios,
+        workers=args.workers,
+        limite_memoria_mb=args.limite_memoria_mb
+    )
+
+    for trio, erro in falhas:
+        print(f"Falha em {trio.regional or '.'} {trio.competencia}: {erro}", file=sys.stderr)
+
+    if not df_lote.empty:
+        colunas = ["regional", "competencia"] + (
+            [c for c in df_lote.columns if c not in ("regional", "competencia")]
+            if args.todas_colunas else ORDEM_COLUNAS
+        )
+        salvar_resultado(df_lote[colunas], args.saida)
+        print(f"{len(trios) - len(falhas)} de {len(trios)} competências gravadas em {args.saida}")
+
+    return 1 if falhas else 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m precos",
+        description="Recalcula os reajustes por corporação a partir dos arquivos de entrada."
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    calcular = comandos.add_parser("calcular", help="processa um trio de arquivos")
+    calcular.add_argument("base_12m", help="base_12m.xlsx")
+    calcular.add_argument("reajuste", help="Reajuste_MMYYYY.csv")
+    calcular.add_argument("usr", help="usr_MMYY.csv")
+    calcular.add_argument(
+        "-o", "--saida", default="resultado.csv",
+        help="arquivo de saída (.csv, .xlsx ou .parquet, padrão: resultado.csv)"
+    )
+    calcular.add_argument(
+        "--todas-colunas", action="store_true",
+        help="inclui as colunas auxiliares (fatmodproj, custo_projetado, ...)"
+    )
+    calcular.add_argument(
+        "--motor-xlsx", choices=MOTORES_XLSX, default=MOTOR_XLSX_PADRAO,
+        help="leitor do base_12m.xlsx (padrão: auto = calamine se instalado)"
+    )
+    calcular.add_argument(
+        "--motor-consolidacao", choices=MOTORES_CONSOLIDACAO, default="pandas",
+        help="pandas (em memória) ou duckdb (SQL fora da memória, requer o pacote duckdb)"
+    )
+    calcular.add_argument(
+        "--limite-memoria", default=LIMITE_MEMORIA_SQL_PADRAO,
+        help=f"limite de memória do duckdb antes de gravar em disco (padrão: {LIMITE_MEMORIA_SQL_PADRAO})"
+    )
+    calcular.add_argument(
+        "--threads", type=int, default=None,
+        help="núcleos usados pelo duckdb (padrão: todos)"
+    )
+    calcular.add_argument(
+        "--diagnostico", metavar="ARQUIVO.json",
+        help="grava tempo, linhas e pico de memória do processo de cada etapa em JSON"
+    )
+    calcular.add_argument(
+        "--medir-alocacoes", action="store_true",
+        help="inclui no diagnóstico o pico alocado por etapa (tracemalloc; ~3x mais lento)"
+    )
+    calcular.set_defaults(executar=comando_calcular)
+
+    lote = comandos.add_parser(
+        "lote",
+        help="processa todos os trios de um diretório em paralelo"
+    )
+    lote.add_argument(
+        "diretorio",
+        help="pasta com Reajuste_MMYYYY.csv, usr_MMYY.csv e base_12m[_MMYYYY].xlsx "
+             "(subpastas são tratadas como regionais)"
+    )
+    lote.add_argument(
+        "-o", "--saida", default="resultado_lote.csv",
+        help="arquivo de saída (.csv, .xlsx ou .parquet, padrão: resultado_lote.csv)"
+    )
+    lote.add_argument(
+        "--workers", type=int, default=None,
+        help="número de processos (padrão: nº de CPUs)"
+    )
+    lote.add_argument(
+        "--limite-memoria-mb", type=int, default=None,
+        help="limite do espaço de endereçamento por processo, em MB (somente POSIX; inclui o que o worker ocupa ao iniciar, ~1,4 GB)"
+    )
+    lote.add_argument(
+        "--todas-colunas", action="store_true",
+        help="inclui as colunas auxiliares (fatmodproj, custo_projetado, ...)"
+    )
+    lote.set_defaults(executar=comando_lote)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return args.executar(args)
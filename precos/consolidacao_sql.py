@@ -0,0 +1,230 @@
+"""Consolidação fora da memória com DuckDB (opcional).
+
+Mesmo resultado do consolidar_corporacoes, mas as junções por contrato /
+corporação, as somas, a receita sem reajuste e o custo projetado rodam numa
+consulta SQL colunar direto sobre os arquivos. O DuckDB usa todos os
+núcleos e grava em disco (temp_directory) o que não couber no limite de
+memória. Só o resultado por corporação volta para o pandas.
+
+Os CSVs são lidos direto pelo DuckDB. O base_12m pode vir em XLSX (lido
+pelo ler_xlsx_esquema e entregue ao DuckDB) ou já convertido em Parquet.
+"""
+import importlib.util
+import os
+import tempfile
+from contextlib import ExitStack, nullcontext
+from pathlib import Path
+
+import pandas as pd
+
+from .agregacao import COLUNAS_SOMA_BASE
+from .calculo import recalcular_reajustes
+from .esquemas import ESQUEMA_BASE_12M, ESQUEMA_REAJUSTE, ESQUEMA_USR
+from .ingestao import COLUNAS_USR, MOTOR_XLSX_PADRAO, ler_xlsx_esquema, padronizar_colunas
+from .parametros import BASE_CM, MAPA_FAIXA, compilar_matriz_cm, pontos_equilibrio
+
+LIMITE_MEMORIA_SQL_PADRAO = "4GB"
+
+# "pandas" = consolidar_corporacoes (em memória); "duckdb" = esta consulta
+MOTORES_CONSOLIDACAO = ["pandas", "duckdb"]
+
+
+def duckdb_disponivel():
+    return importlib.util.find_spec("duckdb") is not None
+
+
+# =============================
+# FONTES (arquivo -> tabela SQL)
+# =============================
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _tipo_sql(tipo):
+    if tipo is None:
+        return None
+    if isinstance(tipo, pd.CategoricalDtype):
+        return "VARCHAR"
+    return {"float64": "DOUBLE", "int64": "BIGINT"}[tipo]
+
+
+def _caminho_local(arquivo, pasta, nome, pilha):
+    # O DuckDB lê caminhos: bytes / arquivos abertos (uploads) vão para um
+    # arquivo temporário, apagado no fim da consulta
+    if isinstance(arquivo, (str, Path)):
+        return Path(arquivo)
+
+    dados = arquivo if isinstance(arquivo, (bytes, bytearray)) else arquivo.getvalue()
+    descritor, caminho = tempfile.mkstemp(suffix=nome, dir=pasta)
+    with os.fdopen(descritor, "wb") as destino:
+        destino.write(dados)
+    pilha.callback(os.remove, caminho)
+    return Path(caminho)
+
+
+def _select_csv(caminho, esquema, renomear=None, paralelo=True):
+    # Mesmo esquema do ler_csv_esquema: só as colunas usadas, com os nomes
+    # padronizados e os tipos declarados. paralelo=False lê o arquivo numa
+    # thread só, na ordem das linhas
+    cabecalho = pd.read_csv(caminho, sep=";", encoding="latin1", nrows=0).columns
+    nomes_originais = dict(zip(padronizar_colunas(cabecalho), cabecalho))
+
+    ausentes = [col for col in esquema if col not in nomes_originais]
+    if ausentes:
+        raise KeyError(f"Colunas ausentes no arquivo: {ausentes}")
+
+    renomear = renomear or {}
+    tipos = ", ".join(
+        f"{_literal(nomes_originais[col])}: {_literal(_tipo_sql(tipo))}"
+        for col, tipo in esquema.items()
+        if tipo is not None
+    )
+    colunas = ", ".join(
+        f'"{nomes_originais[col]}" AS {renomear.get(col, col)}'
+        for col in esquema
+    )
+    return (
+        f"SELECT {colunas} FROM read_csv({_literal(caminho)}, delim = ';', header = true, "
+        f"encoding = 'latin-1', types = {{{tipos}}}, parallel = {str(paralelo).lower()})"
+    )
+
+
+def _tabela_cm(base_cm):
+    # Descrição da faixa no usr (MAPA_FAIXA) -> CM masculino / feminino
+    matriz = compilar_matriz_cm(base_cm)
+    linhas = [
+        (descricao, *matriz.valores[:, matriz.faixas.get_loc(faixa)])
+        for descricao, faixa in MAPA_FAIXA.items()
+        if faixa in matriz.faixas
+    ]
+    return pd.DataFrame(linhas, columns=["descricao", "cm_masculino", "cm_feminino"])
+
+
+# =============================
+# CONSULTA
+# =============================
+_SQL_CONSOLIDACAO = """
+WITH somas AS (
+    SELECT id_corporacao, {somas}
+    FROM base_12m
+    WHERE id_corporacao IS NOT NULL
+    GROUP BY id_corporacao
+),
+contrato_corp AS (
+    SELECT DISTINCT id_contrato, id_corporacao
+    FROM base_12m
+    WHERE id_contrato IS NOT NULL AND id_corporacao IS NOT NULL
+),
+reaj AS (
+    SELECT
+        rowid AS linha,
+        codigo_contrato,
+        empresa,
+        COALESCE(total_usuarios_coletivo, 0) + COALESCE(total_usuarios_privativo, 0) AS vidas,
+        12 * (
+            (COALESCE(vigente_coletivo, 0) * COALESCE(total_usuarios_coletivo, 0))
+            + (COALESCE(vigente_privativo, 0) * COALESCE(total_usuarios_privativo, 0))
+        ) AS receita_sem_reajuste,
+        reajuste_financeiro / 100 AS indice
+    FROM reajuste
+),
+reaj_corp AS (
+    SELECT
+        cc.id_corporacao,
+        first(r.empresa ORDER BY r.linha) FILTER (WHERE r.empresa IS NOT NULL) AS empresa,
+        SUM(r.vidas) AS vidas,
+        AVG(r.indice) AS indice_financeiro,
+        SUM(r.receita_sem_reajuste) AS receita_sem_reajuste
+    FROM reaj r
+    JOIN contrato_corp cc ON r.codigo_contrato = cc.id_contrato
+    GROUP BY cc.id_corporacao
+),
+custo AS (
+    SELECT
+        u.id_corporacao,
+        COALESCE(SUM(
+            u.qtd_usuarios
+            * CASE WHEN upper(trim(u.sexo)) = 'MASCULINO' THEN cm.cm_masculino ELSE cm.cm_feminino END
+            * 12
+        ), 0) AS custo_projetado
+    FROM usr u
+    JOIN cm_faixas cm ON upper(trim(u.faixa_etaria)) = cm.descricao
+    GROUP BY u.id_corporacao
+)
+SELECT
+    s.id_corporacao, {colunas_somas},
+    rc.empresa, rc.vidas, rc.indice_financeiro, rc.receita_sem_reajuste,
+    c.custo_projetado
+FROM somas s
+JOIN reaj_corp rc ON rc.id_corporacao = s.id_corporacao
+LEFT JOIN custo c ON c.id_corporacao = s.id_corporacao
+ORDER BY s.id_corporacao
+"""
+
+
+def consolidar_corporacoes_sql(
+    base_12m,
+    reajuste,
+    usr,
+    limite_memoria=LIMITE_MEMORIA_SQL_PADRAO,
+    threads=None,
+    pasta_temporaria=None,
+    motor_xlsx=MOTOR_XLSX_PADRAO,
+    base_cm=None,
+    interromper_ao_cancelar=None
+):
+    # interromper_ao_cancelar (opcional): recebe conexao.interrupt e devolve
+    # o contexto em que a consulta roda (InstrumentacaoTarefa.interromper_ao_cancelar)
+    import duckdb
+
+    with ExitStack() as pilha:
+        if pasta_temporaria is None:
+            pasta_temporaria = pilha.enter_context(tempfile.TemporaryDirectory(prefix="precos_sql_"))
+
+        configuracao = {"memory_limit": limite_memoria, "temp_directory": str(pasta_temporaria)}
+        if threads:
+            configuracao["threads"] = threads
+        conexao = pilha.enter_context(duckdb.connect(config=configuracao))
+
+        # ---------- BASE 12M ----------
+        caminho_base = _caminho_local(base_12m, pasta_temporaria, "_base_12m.xlsx", pilha)
+        if caminho_base.suffix.lower() == ".parquet":
+            colunas = ", ".join(ESQUEMA_BASE_12M)
+            conexao.execute(f"CREATE VIEW base_12m AS SELECT {colunas} FROM read_parquet({_literal(caminho_base)})")
+        else:
+            conexao.register("base_12m", ler_xlsx_esquema(caminho_base, ESQUEMA_BASE_12M, motor_xlsx))
+
+        # ---------- CSVs ----------
+        caminho_reaj = _caminho_local(reajuste, pasta_temporaria, "_reajuste.csv", pilha)
+        caminho_usr = _caminho_local(usr, pasta_temporaria, "_usr.csv", pilha)
+        # O reajuste vira tabela, lida em ordem: o rowid é a linha do arquivo
+        # e decide a empresa da corporação (a primeira, como no pandas)
+        conexao.execute(f"CREATE TEMP TABLE reajuste AS {_select_csv(caminho_reaj, ESQUEMA_REAJUSTE, paralelo=False)}")
+        conexao.execute(f"CREATE VIEW usr AS {_select_csv(caminho_usr, ESQUEMA_USR, COLUNAS_USR)}")
+        conexao.register("cm_faixas", _tabela_cm(BASE_CM if base_cm is None else base_cm))
+
+        contexto = nullcontext() if interromper_ao_cancelar is None else interromper_ao_cancelar(conexao.interrupt)
+        with contexto:
+            df_corp = conexao.execute(_SQL_CONSOLIDACAO.format(
+                somas=", ".join(f"COALESCE(SUM({col}), 0) AS {col}" for col in COLUNAS_SOMA_BASE),
+                colunas_somas=", ".join(f"s.{col}" for col in COLUNAS_SOMA_BASE),
+            )).df()
+
+    # Mesmas colunas e tipos do consolidar_corporacoes
+    for col in COLUNAS_SOMA_BASE + ["vidas", "indice_financeiro", "receita_sem_reajuste", "custo_projetado"]:
+        df_corp[col] = df_corp[col].astype("float64")
+    df_corp["empresa"] = df_corp["empresa"].astype("str")
+
+    df_corp.insert(
+        df_corp.columns.get_loc("indice_financeiro") + 1,
+        "ponto_equilibrio",
+        pontos_equilibrio(df_corp["vidas"].to_numpy())
+    )
+    df_corp["ajuste_mv"] = 0.0
+    df_corp["expurgo"] = 0.0
+
+    return df_corp
+
+
+def calcular_df_corp_sql(base_12m, reajuste, usr, **kwargs):
+    return recalcular_reajustes(consolidar_corporacoes_sql(base_12m, reajuste, usr, **kwargs))
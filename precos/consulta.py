@@ -0,0 +1,108 @@
+"""Filtro, ordenação e paginação do df_corp no servidor.
+
+A interface só recebe a página visível; os totais da carteira são
+calculados sobre todas as corporações.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from .regras import _numerico
+
+TAMANHOS_PAGINA = [50, 100, 250, 500]
+
+
+# =============================
+# FILTRO
+# =============================
+# Cada critério None é ignorado; devolve a máscara booleana das linhas
+def filtrar_corporacoes(
+    df,
+    obs=None,
+    ind_aporte=None,
+    vidas_min=None,
+    vidas_max=None,
+    reajuste_meta_min=None,
+    busca=None
+):
+    mascara = np.ones(len(df), dtype=bool)
+
+    if obs:
+        mascara &= df["obs"].isin(obs).to_numpy()
+
+    if ind_aporte:
+        mascara &= (df["ind_aporte"] == ind_aporte).to_numpy()
+
+    vidas = _numerico(df["vidas"])
+    if vidas_min is not None:
+        mascara &= vidas >= vidas_min
+    if vidas_max is not None:
+        mascara &= vidas <= vidas_max
+
+    if reajuste_meta_min is not None:
+        mascara &= _numerico(df["reajuste_meta"]) >= reajuste_meta_min
+
+    # Busca por texto na empresa ou no id da corporação
+    if busca:
+        texto = df["empresa"].astype("string").str.contains(busca, case=False, regex=False)
+        texto |= df["id_corporacao"].astype("string").str.contains(busca, regex=False)
+        mascara &= texto.fillna(False).to_numpy(dtype=bool)
+
+    return mascara
+
+
+# =============================
+# ORDENAÇÃO + PAGINAÇÃO
+# =============================
+# Ordena só a coluna escolhida (NaN no fim) e recorta a página pedida;
+# devolve (df_pagina, total_paginas). A página é ajustada ao intervalo válido.
+def paginar_corporacoes(df, colunas, mascara=None, ordenar_por=None, crescente=True, pagina=1, tamanho_pagina=100):
+    posicoes = np.arange(len(df)) if mascara is None else np.flatnonzero(mascara)
+
+    if ordenar_por is not None:
+        chave = df[ordenar_por].iloc[posicoes].reset_index(drop=True)
+        ordem = chave.sort_values(ascending=crescente, kind="stable", na_position="last").index
+        posicoes = posicoes[ordem.to_numpy()]
+
+    total_paginas = max(1, math.ceil(len(posicoes) / tamanho_pagina))
+    pagina = min(max(int(pagina), 1), total_paginas)
+    inicio = (pagina - 1) * tamanho_pagina
+
+    return df.iloc[posicoes[inicio:inicio + tamanho_pagina]][colunas], total_paginas
+
+
+# =============================
+# RESUMO DA CARTEIRA
+# =============================
+# Totais e médias ponderadas por vidas / receita (nunca média simples de razões)
+def resumir_carteira(df, mascara=None):
+    if mascara is not None:
+        df = df[mascara]
+
+    vidas = np.nan_to_num(_numerico(df["vidas"]))
+    receita = np.nan_to_num(_numerico(df["receita_assistencial"]))
+    liquido = np.nan_to_num(_numerico(df["custo_assistencial_liquido"]))
+    reajuste_meta = _numerico(df["reajuste_meta"])
+    reajuste_comercial = _numerico(df["reajuste_comercial"])
+
+    def media_ponderada(valores, pesos):
+        valido = np.isfinite(valores)
+        peso_total = pesos[valido].sum()
+        return float((valores[valido] * pesos[valido]).sum() / peso_total) if peso_total else np.nan
+
+    return {
+        "corporacoes": len(df),
+        "vidas": float(vidas.sum()),
+        "receita_assistencial": float(receita.sum()),
+        "custo_assistencial_liquido": float(liquido.sum()),
+        "sinistralidade": float(liquido.sum() / receita.sum()) if receita.sum() else np.nan,
+        "reajuste_meta": media_ponderada(reajuste_meta, vidas),
+        "reajuste_comercial": media_ponderada(reajuste_comercial, vidas),
+        "com_aporte": int((df["ind_aporte"] == "S").sum()),
+    }
+
+
+# Valores distintos de obs para o filtro (sem NaN, ordenados)
+def opcoes_obs(df):
+    return sorted(pd.unique(df["obs"].dropna()).tolist())
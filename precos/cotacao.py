@@ -0,0 +1,112 @@
+"""Precificação de cotações (produto, valor base, vidas).
+
+A aba Pricing usa a mesma função para uma cotação ou para uma planilha
+inteira: o fator do produto sai do vetor codificado de parametros e o ponto
+de equilíbrio da busca nas faixas de vidas, tudo em uma passada.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .esquemas import ESQUEMA_COTACAO
+from .ingestao import MOTOR_XLSX_PADRAO, ler_csv_esquema, ler_xlsx_esquema
+from .parametros import CODIGOS_PRODUTO, FATORES_PRODUTO, pontos_equilibrio
+
+# Parcela fixa descontada da margem, além do ponto de equilíbrio
+PERCENTUAL_FIXO_MARGEM = 0.15
+
+
+# Produto desconhecido (ou vazio) fica com fator NaN
+def fatores_produto(produtos):
+    nomes = pd.Index(produtos, dtype="string").str.strip().str.upper()
+    codigos = CODIGOS_PRODUTO.get_indexer(nomes)
+    return np.where(codigos >= 0, FATORES_PRODUTO[codigos], np.nan)
+
+
+# Número ou texto no formato pt-BR -> float64: vírgula decimal ("1000,50",
+# "1.000,50") e ponto só de milhar ("1.000", "12.500.000" valem mil e doze
+# milhões e meio, não 1,0 / 12,5). Células já numéricas (XLSX) ficam como
+# estão. Devolve também a máscara do que veio preenchido mas não é número.
+PADRAO_MILHAR = r"[+-]?\d{1,3}(?:\.\d{3})+"
+
+
+def _para_numero(serie):
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype="float64", na_value=np.nan), np.zeros(len(serie), dtype=bool)
+
+    e_texto = serie.map(lambda valor: isinstance(valor, str)).to_numpy(dtype=bool)
+    texto = serie.astype("string").str.strip()
+    pt_br = e_texto & (
+        texto.str.contains(",", regex=False) | texto.str.fullmatch(PADRAO_MILHAR)
+    ).fillna(False).to_numpy(dtype=bool)
+    texto = texto.mask(pt_br, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+
+    valores = pd.to_numeric(texto, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    preenchido = (texto.fillna("") != "").to_numpy(dtype=bool)
+    return valores, np.isnan(valores) & preenchido
+
+
+# =============================
+# PRECIFICAÇÃO VETORIZADA
+# =============================
+# Arrays por cotação: fator do produto, ponto de equilíbrio, preço e margem.
+# Sem vidas não há ponto de equilíbrio, e sem produto conhecido não há margem.
+def precificar(produtos, valores_base, vidas):
+    fator_produto = fatores_produto(produtos)
+    vidas = np.asarray(vidas, dtype="float64")
+    ponto_equilibrio = np.where(np.isnan(vidas), np.nan, pontos_equilibrio(vidas))
+
+    return {
+        "fator_produto": fator_produto,
+        "ponto_equilibrio": ponto_equilibrio,
+        "preco_ajustado": np.asarray(valores_base, dtype="float64") * fator_produto,
+        "margem": np.where(np.isnan(fator_produto), np.nan, 1 - PERCENTUAL_FIXO_MARGEM - ponto_equilibrio),
+    }
+
+
+# Uma cotação (widget da aba Pricing): mesma conta, vetor de 1 elemento
+def precificar_cotacao(produto, valor_base, vidas):
+    resultado = precificar([produto], [valor_base], [vidas])
+    return float(resultado["preco_ajustado"][0]), float(resultado["margem"][0])
+
+
+# DataFrame com as colunas do ESQUEMA_COTACAO -> mesmas linhas + resultado.
+# Linha com problema (produto fora da tabela, valor ilegível ou ausente)
+# fica sem ponto de equilíbrio, preço e margem, com o motivo em "erro".
+def precificar_cotacoes(df):
+    valores_base, valor_ilegivel = _para_numero(df["valor_base"])
+    vidas, vidas_ilegiveis = _para_numero(df["vidas"])
+    resultado = precificar(df["produto"], valores_base, vidas)
+
+    texto = lambda coluna: df[coluna].astype("string").fillna("").to_numpy(dtype=object)
+    problemas = [
+        (np.isnan(resultado["fator_produto"]), "produto fora da tabela"),
+        (valor_ilegivel, "valor_base não numérico: " + texto("valor_base")),
+        (np.isnan(valores_base) & ~valor_ilegivel, "valor_base ausente"),
+        (vidas_ilegiveis, "vidas não numérico: " + texto("vidas")),
+        (np.isnan(vidas) & ~vidas_ilegiveis, "vidas ausente"),
+    ]
+    erro = np.full(len(df), "", dtype=object)
+    for mascara, motivo in problemas:
+        erro = np.where(mascara, np.where(erro == "", motivo, erro + "; " + motivo), erro)
+    valida = erro == ""
+
+    df = df.copy(deep=False)
+    df["valor_base"] = valores_base
+    df["vidas"] = vidas
+    for coluna, valores in resultado.items():
+        df[coluna] = valores if coluna == "fator_produto" else np.where(valida, valores, np.nan)
+    df["produto_valido"] = ~np.isnan(resultado["fator_produto"])
+    df["erro"] = np.where(valida, None, erro)
+    return df
+
+
+# =============================
+# LEITURA DA PLANILHA
+# =============================
+# CSV (";" / latin1, como os demais arquivos) ou XLSX, pela extensão do nome
+def processar_cotacoes(arquivo, nome_arquivo, motor=MOTOR_XLSX_PADRAO):
+    if Path(nome_arquivo).suffix.lower() == ".xlsx":
+        return ler_xlsx_esquema(arquivo, ESQUEMA_COTACAO, motor)
+    return ler_csv_esquema(arquivo, ESQUEMA_COTACAO)
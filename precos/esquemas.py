@@ -0,0 +1,59 @@
+"""Esquema de cada arquivo de entrada: colunas usadas e tipo de cada uma.
+
+As chaves são os nomes já padronizados (padronizar_colunas). Só essas
+colunas são lidas do arquivo; tipo None deixa o pandas inferir.
+
+Nos CSVs os ids são lidos como float64 (Int64 é bem mais lento no parse e
+int64 não aceita id em branco); as linhas sem id são descartadas na
+ingestão, como nos merges, e os ids voltam a int64. No base_12m o tipo vem
+do próprio Excel.
+"""
+import pandas as pd
+
+# =============================
+# BASE 12M (XLSX)
+# =============================
+ESQUEMA_BASE_12M = {
+    "id_contrato": None,
+    "id_corporacao": None,
+    "receita_assistencial": "float64",
+    "custo_assistencial_liquido": "float64",
+    "custo_assistencial_bruto": "float64",
+    "valor_receita_faturada_fator_moderador_esp017": "float64",
+}
+
+# =============================
+# REAJUSTE_MMYYYY.CSV
+# =============================
+ESQUEMA_REAJUSTE = {
+    "codigo_contrato": "float64",
+    "empresa": None,
+    "total_usuarios_coletivo": "float64",
+    "total_usuarios_privativo": "float64",
+    "reajuste_financeiro": "float64",
+    "vigente_coletivo": "float64",
+    "vigente_privativo": "float64",
+}
+
+# =============================
+# USR_MMYY.CSV
+# =============================
+# Sexo e faixa etária têm poucos valores distintos: como categóricos, a
+# padronização roda só sobre as categorias e não sobre cada linha.
+ESQUEMA_USR = {
+    "id_corporacao_contrato": "float64",
+    "descricao_tipo_sexo": pd.CategoricalDtype(),
+    "descricao_faixa_etaria_10_faixas": pd.CategoricalDtype(),
+    "qtd_usuarios_ativos_ultimo_dia_competencia": "float64",
+}
+
+# =============================
+# COTAÇÕES EM LOTE (CSV OU XLSX)
+# =============================
+# Valores lidos sem tipo: a planilha pode vir com vírgula decimal, e a
+# conversão (com o erro de cada linha) fica em precificar_cotacoes.
+ESQUEMA_COTACAO = {
+    "produto": None,
+    "valor_base": None,
+    "vidas": None,
+}
@@ -0,0 +1,155 @@
+"""Exportação do df_corp em blocos para CSV, XLSX e Parquet.
+
+Cada bloco de linhas é convertido e gravado direto no destino (caminho ou
+arquivo binário aberto); o arquivo final nunca é montado inteiro em memória
+como uma segunda cópia do DataFrame.
+"""
+import codecs
+import importlib.util
+import io
+import threading
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from .calculo import ORDEM_COLUNAS
+
+TAMANHO_BLOCO_EXPORTACAO = 50_000
+
+# formato -> (extensão, mime)
+FORMATOS_EXPORTACAO = {
+    "csv": (".csv", "text/csv"),
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+# Parquet depende do pyarrow, que é opcional
+def formatos_disponiveis():
+    formatos = ["csv", "xlsx"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formatos.append("parquet")
+    return formatos
+
+
+# Colunas da tela primeiro, depois as auxiliares (fatmodproj, custo_projetado, ...)
+def colunas_exportacao(df):
+    principais = [c for c in ORDEM_COLUNAS if c in df.columns]
+    return principais + [c for c in df.columns if c not in principais]
+
+
+# Recorta as linhas antes das colunas: só o bloco é copiado, nunca o df inteiro
+def _blocos(df, colunas, tamanho_bloco):
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco][colunas]
+
+
+@contextmanager
+def _abrir_destino(destino):
+    # Caminho: abre e fecha aqui; arquivo já aberto: fica a cargo de quem chamou
+    if isinstance(destino, (str, Path)):
+        with open(destino, "wb") as arquivo:
+            yield arquivo
+    else:
+        yield destino
+
+
+# =============================
+# CSV (mesmo formato dos arquivos de origem)
+# =============================
+# O CSV sai em latin1, como os arquivos de origem. Caractere fora do latin1
+# (emoji, aspas tipográficas, ...) vira "?" em vez de abortar a exportação;
+# a contagem é por thread e vira um aviso no fim. XLSX e Parquet guardam o
+# texto original.
+_substituicoes = threading.local()
+
+
+def _substituir_contando(erro):
+    _substituicoes.total += erro.end - erro.start
+    return "?" * (erro.end - erro.start), erro.end
+
+
+codecs.register_error("precos_substituir", _substituir_contando)
+
+
+def exportar_csv(df, destino, colunas, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    _substituicoes.total = 0
+    with _abrir_destino(destino) as arquivo:
+        texto = io.TextIOWrapper(arquivo, encoding="latin1", errors="precos_substituir", newline="")
+        texto.write(";".join(colunas) + "\n")
+        for bloco in _blocos(df, colunas, tamanho_bloco):
+            bloco.to_csv(texto, sep=";", index=False, header=False)
+        texto.flush()
+        texto.detach()
+
+    if _substituicoes.total:
+        warnings.warn(
+            f"{_substituicoes.total} caractere(s) fora do latin1 gravados como '?' no CSV; "
+            "use XLSX ou Parquet para manter o texto original",
+            stacklevel=2
+        )
+
+
+# =============================
+# XLSX (openpyxl em modo write_only: linha a linha)
+# =============================
+def _linhas_xlsx(bloco):
+    # NaN/NA viram célula vazia e ±inf vira texto, como o to_excel do pandas
+    bloco = bloco.replace({np.inf: "inf", -np.inf: "-inf"})
+    return bloco.astype(object).where(bloco.notna(), None).itertuples(index=False, name=None)
+
+
+def exportar_xlsx(df, destino, colunas, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("df_corp")
+    planilha.append(list(colunas))
+
+    for bloco in _blocos(df, colunas, tamanho_bloco):
+        for linha in _linhas_xlsx(bloco):
+            planilha.append(linha)
+
+    with _abrir_destino(destino) as arquivo:
+        livro.save(arquivo)
+
+
+# =============================
+# PARQUET (um row group por bloco)
+# =============================
+def exportar_parquet(df, destino, colunas, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Esquema pelos dtypes do DataFrame inteiro, para colunas vazias no 1º
+    # bloco não travarem o tipo; recorte de 0 linhas antes das colunas, sem
+    # copiar o df
+    esquema = pa.Schema.from_pandas(df.iloc[:0][colunas], preserve_index=False)
+
+    # Coluna object não tem tipo no recorte vazio: deduz pelos valores dela
+    for posicao, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type) and df[campo.name].notna().any():
+            tipo = pa.infer_type(df[campo.name].dropna().to_numpy(), from_pandas=True)
+            esquema = esquema.set(posicao, campo.with_type(tipo))
+
+    with _abrir_destino(destino) as arquivo:
+        with pq.ParquetWriter(arquivo, esquema) as escritor:
+            for bloco in _blocos(df, colunas, tamanho_bloco):
+                escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+
+
+EXPORTADORES = {
+    "csv": exportar_csv,
+    "xlsx": exportar_xlsx,
+    "parquet": exportar_parquet,
+}
+
+
+def exportar_df_corp(df, destino, formato="csv", todas_colunas=True, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r} (use {', '.join(EXPORTADORES)})")
+
+    colunas = colunas_exportacao(df) if todas_colunas else [c for c in ORDEM_COLUNAS if c in df.columns]
+    EXPORTADORES[formato](df, destino, colunas, tamanho_bloco=tamanho_bloco)
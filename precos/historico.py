@@ -0,0 +1,140 @@
+"""Histórico dos ajustes manuais (MV / expurgo) como log de deltas.
+
+Cada envio do editor vira um lote de linhas (id_corporacao, campo,
+anterior, novo), só com os valores que mudaram. Desfazer / refazer
+reaplica um lote nas corporações dele (recalcular_corporacoes) e a
+comparação entre dois pontos do histórico recalcula só as corporações
+tocadas, em cópias pequenas. A memória cresce com o número de alterações,
+não com o tamanho da carteira.
+"""
+import numpy as np
+import pandas as pd
+
+from .calculo import recalcular_corporacoes
+
+CAMPOS_AJUSTE = ["ajuste_mv", "expurgo"]
+
+COLUNAS_COMPARACAO = ["ajuste_mv", "expurgo", "reajuste_meta", "reajuste_comercial"]
+
+
+# Lote de deltas entre os valores atuais do df_corp e os ajustes novos
+# (indexados por id_corporacao, com as colunas de CAMPOS_AJUSTE)
+def calcular_deltas(df_corp, ajustes):
+    anterior = df_corp.loc[ajustes.index, CAMPOS_AJUSTE].to_numpy(dtype="float64")
+    novo = ajustes[CAMPOS_AJUSTE].to_numpy(dtype="float64")
+
+    mudou = (novo != anterior) & ~(np.isnan(novo) & np.isnan(anterior))
+    linhas, campos = np.nonzero(mudou)
+
+    return pd.DataFrame({
+        "id_corporacao": ajustes.index.to_numpy()[linhas],
+        "campo": pd.Categorical.from_codes(campos, CAMPOS_AJUSTE),
+        "anterior": anterior[linhas, campos],
+        "novo": novo[linhas, campos],
+    })
+
+
+# Aplica a coluna "anterior" ou "novo" de um lote no df_corp (no lugar) e
+# devolve os ajustes resultantes das corporações afetadas
+def reproduzir_lote(df_corp, lote, valores):
+    ids = pd.unique(lote["id_corporacao"])
+    atuais = df_corp.loc[ids, CAMPOS_AJUSTE].to_numpy(dtype="float64", copy=True)
+    linhas = pd.Index(ids).get_indexer(lote["id_corporacao"])
+    atuais[linhas, lote["campo"].cat.codes.to_numpy()] = lote[valores].to_numpy()
+
+    ajustes = pd.DataFrame(atuais, index=pd.Index(ids, name="id_corporacao"), columns=CAMPOS_AJUSTE)
+    recalcular_corporacoes(df_corp, ajustes)
+    return ajustes
+
+
+class HistoricoAjustes:
+    # lotes[:posicao] estão aplicados no df_corp; a posição 0 é o resultado
+    # como foi aberto (com os ajustes já salvos)
+    def __init__(self):
+        self.lotes = []
+        self.posicao = 0
+
+    @property
+    def pode_desfazer(self):
+        return self.posicao > 0
+
+    @property
+    def pode_refazer(self):
+        return self.posicao < len(self.lotes)
+
+    # =============================
+    # EDIÇÃO / DESFAZER / REFAZER
+    # =============================
+    # Todos devolvem os ajustes das corporações afetadas (para salvar) ou
+    # None quando não há nada a aplicar
+    def aplicar(self, df_corp, ajustes):
+        lote = calcular_deltas(df_corp, ajustes)
+        if lote.empty:
+            return None
+
+        # Editar depois de desfazer descarta os lotes que estavam à frente
+        del self.lotes[self.posicao:]
+        self.lotes.append(lote)
+        self.posicao += 1
+        return reproduzir_lote(df_corp, lote, "novo")
+
+    def desfazer(self, df_corp):
+        if not self.pode_desfazer:
+            return None
+        self.posicao -= 1
+        return reproduzir_lote(df_corp, self.lotes[self.posicao], "anterior")
+
+    def refazer(self, df_corp):
+        if not self.pode_refazer:
+            return None
+        self.posicao += 1
+        return reproduzir_lote(df_corp, self.lotes[self.posicao - 1], "novo")
+
+    # =============================
+    # CONSULTA
+    # =============================
+    def resumo(self):
+        return pd.DataFrame({
+            "lote": np.arange(1, len(self.lotes) + 1),
+            "corporacoes": [lote["id_corporacao"].nunique() for lote in self.lotes],
+            "alteracoes": [len(lote) for lote in self.lotes],
+            "aplicado": np.arange(1, len(self.lotes) + 1) <= self.posicao,
+        })
+
+    # Ajustes de todas as corporações tocadas pelo histórico, como estavam na
+    # posição pedida (0 = antes do primeiro lote)
+    def ajustes_na_posicao(self, df_corp, posicao):
+        if not self.lotes:
+            return pd.DataFrame(columns=CAMPOS_AJUSTE, index=pd.Index([], name="id_corporacao"), dtype="float64")
+
+        todos = pd.concat(
+            [lote.assign(lote=i) for i, lote in enumerate(self.lotes)],
+            ignore_index=True
+        )
+        chaves = ["id_corporacao", "campo"]
+
+        # Valor inicial = "anterior" do primeiro delta de cada (id, campo);
+        # depois, o "novo" do último lote aplicado até a posição
+        valores = todos.groupby(chaves, observed=True)["anterior"].first()
+        aplicados = todos[todos["lote"] < posicao].groupby(chaves, observed=True)["novo"].last()
+        valores.loc[aplicados.index] = aplicados
+
+        ajustes = valores.unstack("campo").reindex(columns=CAMPOS_AJUSTE)
+        ajustes.columns = list(CAMPOS_AJUSTE)
+        # Campo nunca alterado na corporação: o valor é o mesmo em todo o histórico
+        return ajustes.fillna(df_corp.loc[ajustes.index, CAMPOS_AJUSTE])
+
+    # Cenário A × B: só as corporações tocadas, recalculadas em cópias
+    def comparar(self, df_corp, posicao_a, posicao_b):
+        lados = {}
+        for sufixo, posicao in (("a", posicao_a), ("b", posicao_b)):
+            ajustes = self.ajustes_na_posicao(df_corp, posicao)
+            linhas = recalcular_corporacoes(df_corp.loc[ajustes.index].copy(), ajustes)
+            lados[sufixo] = linhas[COLUNAS_COMPARACAO].add_suffix(f"_{sufixo}")
+
+        comparacao = pd.concat([lados["a"], lados["b"]], axis=1)
+        comparacao.insert(0, "empresa", df_corp.loc[comparacao.index, "empresa"])
+        comparacao["diferenca_reajuste_comercial"] = (
+            comparacao["reajuste_comercial_b"] - comparacao["reajuste_comercial_a"]
+        )
+        return comparacao
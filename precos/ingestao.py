@@ -0,0 +1,247 @@
+"""Leitura dos arquivos de entrada e montagem do df_corp."""
+import importlib.util
+import io
+
+import numpy as np
+import pandas as pd
+
+from .agregacao import consolidar_corporacoes
+from .calculo import recalcular_reajustes
+from .esquemas import ESQUEMA_BASE_12M, ESQUEMA_REAJUSTE, ESQUEMA_USR
+from .instrumentacao import etapas_em_paralelo, executar_etapa
+from .parametros import (
+    MAPA_FAIXA,
+    MATRIZ_CM,
+    SEXO_FEMININO,
+    SEXO_MASCULINO,
+    compilar_matriz_cm,
+)
+
+# =============================
+# PADRONIZAÇÃO DE COLUNAS
+# =============================
+def padronizar_colunas(colunas):
+    return (
+        colunas.str.strip().str.lower()
+        .str.replace(" ", "_")
+        .str.replace("ç", "c")
+        .str.replace("ã", "a")
+        .str.replace("á", "a")
+        .str.replace("é", "e")
+        .str.replace("í", "i")
+        .str.replace("ó", "o")
+        .str.replace("ú", "u")
+    )
+
+# =============================
+# ETAPAS DE LEITURA DOS ARQUIVOS
+# =============================
+# Cada etapa aceita um caminho, um arquivo aberto ou os bytes do upload e
+# devolve apenas o que o pipeline usa.
+def _fonte(arquivo):
+    if isinstance(arquivo, (bytes, bytearray)):
+        return io.BytesIO(arquivo)
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+    return arquivo
+
+
+def ler_csv_esquema(arquivo, esquema, **kwargs):
+    # Padroniza só o cabeçalho e traduz o esquema para os nomes originais:
+    # o parse já descarta as colunas que não estão no esquema e aplica os tipos
+    cabecalho = pd.read_csv(_fonte(arquivo), sep=";", encoding="latin1", nrows=0).columns
+    nomes_originais = dict(zip(padronizar_colunas(cabecalho), cabecalho))
+
+    ausentes = [col for col in esquema if col not in nomes_originais]
+    if ausentes:
+        raise KeyError(f"Colunas ausentes no arquivo: {ausentes}")
+
+    renomear = {nomes_originais[col]: col for col in esquema}
+    tipos = {
+        nomes_originais[col]: tipo
+        for col, tipo in esquema.items()
+        if tipo is not None
+    }
+
+    leitura = pd.read_csv(
+        _fonte(arquivo),
+        sep=";",
+        encoding="latin1",
+        usecols=list(renomear),
+        dtype=tipos,
+        **kwargs
+    )
+
+    if "chunksize" in kwargs:
+        return (bloco.rename(columns=renomear) for bloco in leitura)
+    return leitura.rename(columns=renomear)
+
+
+def _codificar_categorias(serie, codificar, codigo_ausente):
+    # Codifica só as categorias distintas (já com upper/strip) e expande pelos
+    # códigos de cada linha; valores ausentes (código -1) pegam o último item
+    serie = serie.astype("category")
+    categorias = serie.cat.categories.astype(str).str.upper().str.strip()
+    codigos_categoria = np.append(codificar(categorias), codigo_ausente)
+
+    return codigos_categoria[serie.cat.codes.to_numpy()]
+
+
+# Leitor do XLSX: "calamine" (python-calamine, bem mais rápido), "openpyxl"
+# (padrão do pandas) ou "auto" (calamine quando estiver instalado)
+MOTORES_XLSX = ["auto", "calamine", "openpyxl"]
+MOTOR_XLSX_PADRAO = "auto"
+
+
+def resolver_motor_xlsx(motor=MOTOR_XLSX_PADRAO):
+    if motor not in MOTORES_XLSX:
+        raise ValueError(f"Motor de XLSX desconhecido: {motor!r} (use {MOTORES_XLSX})")
+    if motor in ("auto", "calamine") and importlib.util.find_spec("python_calamine") is None:
+        return "openpyxl"
+    return "calamine" if motor == "auto" else motor
+
+
+def ler_xlsx_esquema(arquivo, esquema, motor=MOTOR_XLSX_PADRAO):
+    # usecols recebe cada nome do cabeçalho: só as colunas do esquema são
+    # convertidas, sem precisar carregar a planilha inteira num DataFrame
+    df = pd.read_excel(
+        _fonte(arquivo),
+        engine=resolver_motor_xlsx(motor),
+        usecols=lambda nome: padronizar_colunas(pd.Index([str(nome)]))[0] in esquema
+    )
+    df.columns = padronizar_colunas(df.columns)
+
+    ausentes = [col for col in esquema if col not in df.columns]
+    if ausentes:
+        raise KeyError(f"Colunas ausentes no arquivo: {ausentes}")
+
+    return df[list(esquema)].astype(
+        {col: tipo for col, tipo in esquema.items() if tipo is not None}
+    )
+
+
+def processar_base_12m(arquivo, motor=MOTOR_XLSX_PADRAO):
+    return ler_xlsx_esquema(arquivo, ESQUEMA_BASE_12M, motor)
+
+
+def processar_reajuste(arquivo):
+    df_reaj = ler_csv_esquema(arquivo, ESQUEMA_REAJUSTE)
+
+    # Linha sem contrato não casa com o base_12m (como no merge inner)
+    if df_reaj["codigo_contrato"].hasnans:
+        df_reaj = df_reaj[df_reaj["codigo_contrato"].notna()].reset_index(drop=True)
+    return df_reaj.astype({"codigo_contrato": "int64"})
+
+
+# Colunas do usr_MMYY.csv usadas no cálculo (nome padronizado -> nome interno)
+COLUNAS_USR = {
+    "id_corporacao_contrato": "id_corporacao",
+    "descricao_tipo_sexo": "sexo",
+    "descricao_faixa_etaria_10_faixas": "faixa_etaria",
+    "qtd_usuarios_ativos_ultimo_dia_competencia": "qtd_usuarios"
+}
+
+# Linhas lidas por vez do usr_MMYY.csv
+TAMANHO_BLOCO_USR = 200_000
+
+
+def custo_projetado_por_corporacao(df_usr, matriz_cm=MATRIZ_CM):
+    # ---------- CÓDIGOS DE SEXO E FAIXA ----------
+    # Qualquer sexo diferente de MASCULINO usa o CM feminino
+    sexo = _codificar_categorias(
+        df_usr["sexo"],
+        lambda categorias: np.where(categorias == "MASCULINO", SEXO_MASCULINO, SEXO_FEMININO),
+        SEXO_FEMININO
+    )
+    faixa = _codificar_categorias(
+        df_usr["faixa_etaria"],
+        lambda categorias: matriz_cm.faixas.get_indexer(categorias.map(MAPA_FAIXA)),
+        -1
+    )
+
+    # Remove registros sem faixa válida ou sem corporação
+    valido = (faixa >= 0) & df_usr["id_corporacao"].notna().to_numpy()
+
+    # ---------- CUSTO PROJETADO ----------
+    # Um único gather na matriz: qtd_usuarios * cm[sexo, faixa] * 12
+    custo_projetado = (
+        df_usr["qtd_usuarios"].to_numpy(dtype="float64")[valido]
+        * matriz_cm.valores[sexo[valido], faixa[valido]]
+        * 12
+    )
+
+    # ---------- AGREGA POR CORPORAÇÃO ----------
+    return (
+        pd.DataFrame({
+            "id_corporacao": df_usr["id_corporacao"].to_numpy()[valido].astype("int64"),
+            "custo_projetado": custo_projetado
+        })
+        .groupby("id_corporacao", as_index=False)
+        .agg({
+            "custo_projetado": "sum"
+        })
+    )
+
+
+# verificar_cancelamento (opcional) é chamado antes de cada bloco: quem roda
+# o pipeline em segundo plano pode parar a leitura no meio do arquivo
+def processar_usr(arquivo, tamanho_bloco=TAMANHO_BLOCO_USR, base_cm=None, verificar_cancelamento=None):
+    matriz_cm = MATRIZ_CM if base_cm is None else compilar_matriz_cm(base_cm)
+
+    # Lê em blocos apenas as 4 colunas necessárias e pré-agrega cada bloco;
+    # a memória fica proporcional ao nº de corporações, não ao tamanho do arquivo
+    blocos = ler_csv_esquema(arquivo, ESQUEMA_USR, chunksize=tamanho_bloco)
+
+    parciais = []
+    for bloco in blocos:
+        if verificar_cancelamento is not None:
+            verificar_cancelamento()
+        parciais.append(custo_projetado_por_corporacao(bloco.rename(columns=COLUNAS_USR), matriz_cm))
+
+    # Combina as somas parciais
+    return (
+        pd.concat(parciais, ignore_index=True)
+        .groupby("id_corporacao", as_index=False)
+        .agg({
+            "custo_projetado": "sum"
+        })
+    )
+
+
+def montar_df_corp(df_base_sel, df_reaj, df_custo_proj, instrumentacao=None):
+    df_corp = executar_etapa(
+        instrumentacao, "consolidacao",
+        consolidar_corporacoes, df_base_sel, df_reaj, df_custo_proj
+    )
+
+    # Calcula os reajustes iniciais
+    return executar_etapa(instrumentacao, "recalcular_reajustes", recalcular_reajustes, df_corp)
+
+
+# =============================
+# PIPELINE COMPLETO
+# =============================
+# Os três arquivos são lidos ao mesmo tempo (a leitura do XLSX se sobrepõe
+# às dos CSVs); cada resultado só é aguardado na consolidação. Com
+# paralelo=False as leituras rodam uma após a outra, sem threads.
+def calcular_df_corp(base_12m, reajuste, usr, instrumentacao=None, motor_xlsx=MOTOR_XLSX_PADRAO, base_cm=None,
+                     paralelo=True):
+    if not paralelo:
+        return montar_df_corp(
+            executar_etapa(instrumentacao, "base_12m", processar_base_12m, base_12m, motor=motor_xlsx),
+            executar_etapa(instrumentacao, "reajuste", processar_reajuste, reajuste),
+            executar_etapa(instrumentacao, "usr", processar_usr, usr, base_cm=base_cm),
+            instrumentacao=instrumentacao
+        )
+
+    with etapas_em_paralelo(instrumentacao, max_workers=3) as submeter:
+        leitura_base = submeter("base_12m", processar_base_12m, base_12m, motor=motor_xlsx)
+        leitura_reaj = submeter("reajuste", processar_reajuste, reajuste)
+        leitura_usr = submeter("usr", processar_usr, usr, base_cm=base_cm)
+
+        return montar_df_corp(
+            leitura_base.result(),
+            leitura_reaj.result(),
+            leitura_usr.result(),
+            instrumentacao=instrumentacao
+        )
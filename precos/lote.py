@@ -0,0 +1,159 @@
+"""Processamento de várias competências (trios de arquivos) em paralelo."""
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from .ingestao import calcular_df_corp
+from .validacao import descrever_problemas, validar_entradas
+
+# Um trio de arquivos de uma competência (e regional, quando houver subpastas)
+TrioArquivos = namedtuple("TrioArquivos", ["regional", "competencia", "base_12m", "reajuste", "usr"])
+
+# =============================
+# PADRÕES DE NOME DOS ARQUIVOS
+# =============================
+# Reajuste_MMYYYY.csv, usr_MMYY.csv e base_12m.xlsx / base_12m_MMYYYY.xlsx
+PADRAO_REAJUSTE = re.compile(r"^reajuste_(\d{2})(\d{4})\.csv$", re.IGNORECASE)
+PADRAO_USR = re.compile(r"^usr_(\d{2})(\d{2})\.csv$", re.IGNORECASE)
+PADRAO_BASE = re.compile(r"^base_12m(?:_(\d{2})(\d{4}))?\.xlsx$", re.IGNORECASE)
+
+
+# =============================
+# DESCOBERTA DOS TRIOS
+# =============================
+def descobrir_trios(diretorio):
+    # Cada pasta (a raiz ou subpastas regionais) é varrida separadamente.
+    # Um base_12m.xlsx sem competência no nome vale para todas as
+    # competências da pasta que não tenham um base_12m_MMYYYY.xlsx próprio.
+    diretorio = Path(diretorio)
+    trios = []
+
+    for pasta, _, arquivos in sorted(os.walk(diretorio)):
+        reajustes, usrs, bases = {}, {}, {}
+        base_geral = None
+
+        for nome in arquivos:
+            caminho = Path(pasta) / nome
+
+            if m := PADRAO_REAJUSTE.match(nome):
+                reajustes[f"{m[2]}-{m[1]}"] = caminho
+            elif m := PADRAO_USR.match(nome):
+                usrs[f"20{m[2]}-{m[1]}"] = caminho
+            elif m := PADRAO_BASE.match(nome):
+                if m[1]:
+                    bases[f"{m[2]}-{m[1]}"] = caminho
+                else:
+                    base_geral = caminho
+
+        regional = Path(pasta).relative_to(diretorio).as_posix()
+
+        for competencia in sorted(reajustes.keys() & usrs.keys()):
+            base_12m = bases.get(competencia, base_geral)
+            if base_12m is None:
+                continue
+
+            trios.append(TrioArquivos(
+                regional="" if regional == "." else regional,
+                competencia=competencia,
+                base_12m=base_12m,
+                reajuste=reajustes[competencia],
+                usr=usrs[competencia]
+            ))
+
+    return trios
+
+
+# =============================
+# EXECUÇÃO NOS WORKERS
+# =============================
+# Preenchido pelo initializer quando o limite pedido não cabe no worker
+_limite_recusado = None
+
+
+def _espaco_enderecamento_mb():
+    # VmSize do próprio processo (só Linux); None quando não dá para medir
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith("VmSize:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _iniciar_worker(limite_memoria_mb):
+    # Limita o espaço de endereçamento de cada processo (só em sistemas POSIX);
+    # ao estourar, o trio falha com MemoryError sem derrubar os demais. Um
+    # limite abaixo do que o worker já ocupa (pandas e numpy importados) não
+    # é aplicado: os trios falham na hora, com a mensagem.
+    global _limite_recusado
+    if limite_memoria_mb:
+        import resource
+
+        em_uso = _espaco_enderecamento_mb()
+        if em_uso is not None and limite_memoria_mb <= em_uso:
+            _limite_recusado = (
+                f"--limite-memoria-mb {limite_memoria_mb} é menor que o espaço que o "
+                f"worker já ocupa ao iniciar ({em_uso:,.0f} MB)"
+            )
+            return
+
+        limite = int(limite_memoria_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _processar_trio(trio):
+    if _limite_recusado is not None:
+        raise MemoryError(_limite_recusado)
+
+    # Leituras em série: sem threads no worker, faltar memória vira um
+    # MemoryError deste trio (numa thread do pool, o worker travava)
+    df_corp = calcular_df_corp(trio.base_12m, trio.reajuste, trio.usr, paralelo=False)
+    df_corp.insert(0, "competencia", trio.competencia)
+    df_corp.insert(0, "regional", trio.regional)
+    return df_corp
+
+
+def processar_lote(trios, workers=None, limite_memoria_mb=None):
+    resultados = []
+    falhas = []
+
+    # Cabeçalhos conferidos antes: trio fora do layout falha sem ocupar um worker
+    validos = []
+    for trio in trios:
+        df_problemas = validar_entradas(trio.base_12m, trio.reajuste, trio.usr)
+        if df_problemas.empty:
+            validos.append(trio)
+        else:
+            falhas.append((trio, f"Layout: {descrever_problemas(df_problemas)}"))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_iniciar_worker,
+        initargs=(limite_memoria_mb,)
+    ) as executor:
+        futuros = {executor.submit(_processar_trio, trio): trio for trio in validos}
+
+        for futuro in as_completed(futuros):
+            trio = futuros[futuro]
+            try:
+                resultados.append(futuro.result())
+            except Exception as erro:
+                falhas.append((trio, f"{type(erro).__name__}: {erro}"))
+
+    if not resultados:
+        return pd.DataFrame(), falhas
+
+    # Tabela longa ordenada por regional/competência
+    df_lote = (
+        pd.concat(resultados, ignore_index=True)
+        .sort_values(["regional", "competencia", "id_corporacao"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+    return df_lote, falhas
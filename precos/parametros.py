@@ -0,0 +1,118 @@
+"""Tabelas de parâmetros usadas no cálculo de preços e reajustes."""
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# BASE DE PRODUTOS
+# =============================
+PRODUTOS_PARAMETROS = {
+    "UNIMED EXECUTIVO": 2.288633433,
+    "UNIMED EXECUTIVO COMFORT": 2.041152113,
+    "UNIMED EXECUTIVO PREMIUM": 2.524444286,
+    "UNIMED NACIONAL REDE BASICA": 1.179901365,
+    "UNIMED NACIONAL REDE ESPECIAL": 1.651776142,
+    "UNIMED PLENO 80": 1.165320563,
+    "UNIMED PLENO 100": 1.650346651,
+    "UNIMED PLENO 200": 1.741369452,
+    "CORPORATIVO SUPERIOR APTO": 1.826545754,
+}
+
+# Produtos codificados: a posição do nome em CODIGOS_PRODUTO (get_indexer)
+# é o índice do fator em FATORES_PRODUTO
+CODIGOS_PRODUTO = pd.Index(list(PRODUTOS_PARAMETROS))
+FATORES_PRODUTO = np.array(list(PRODUTOS_PARAMETROS.values()), dtype="float64")
+
+
+# =============================
+# BASE DE CUSTO MÉDIO (CM)
+# =============================
+BASE_CM = pd.DataFrame({
+    "faixa_etaria": [
+        "0-18", "19-23", "24-28", "29-33", "34-38",
+        "39-43", "44-48", "49-53", "54-58", "59-999"
+    ],
+    "cm_masculino": [
+        350.57, 154.03, 187.26, 219.73, 236.74,
+        277.15, 353.56, 400.63, 570.91, 1074.40
+    ],
+    "cm_feminino": [
+        246.35, 234.78, 335.68, 386.81, 401.83,
+        457.36, 501.02, 561.06, 615.32, 1058.30
+    ]
+})
+
+
+# =============================
+# MATRIZ DE CM (SEXO x FAIXA)
+# =============================
+# Linha 0 = masculino, linha 1 = feminino (e qualquer outro valor de sexo);
+# colunas na ordem das faixas da tabela. Outra tabela de CM (por exemplo, por
+# produto) é só compilar outro DataFrame com o mesmo layout de BASE_CM.
+MatrizCM = namedtuple("MatrizCM", ["faixas", "valores"])
+
+SEXO_MASCULINO = 0
+SEXO_FEMININO = 1
+
+
+def compilar_matriz_cm(base_cm):
+    return MatrizCM(
+        faixas=pd.Index(base_cm["faixa_etaria"]),
+        valores=np.vstack([
+            base_cm["cm_masculino"].to_numpy(dtype="float64"),
+            base_cm["cm_feminino"].to_numpy(dtype="float64"),
+        ])
+    )
+
+
+MATRIZ_CM = compilar_matriz_cm(BASE_CM)
+
+
+# =============================
+# FUNÇÃO DE PONTO DE EQUILÍBRIO
+# =============================
+# Limite superior (inclusive) de vidas de cada faixa; acima do último vale o
+# último ponto (vidas NaN também caem nele, como no antigo if/elif)
+LIMITES_VIDAS_PE = np.array([199, 499, 999], dtype="float64")
+PONTOS_EQUILIBRIO = np.array([0.75, 0.78, 0.80, 0.82])
+
+
+# Vetorizado: uma busca binária nos limites para todas as vidas de uma vez
+def pontos_equilibrio(vidas):
+    return PONTOS_EQUILIBRIO[np.searchsorted(LIMITES_VIDAS_PE, vidas, side="left")]
+
+
+def obter_ponto_equilibrio(vidas):
+    return float(pontos_equilibrio(vidas))
+
+
+# ---------- MAPA DE FAIXA ETÁRIA ----------
+MAPA_FAIXA = {
+    "0 A 18": "0-18",
+    "19 A 23": "19-23",
+    "24 A 28": "24-28",
+    "29 A 33": "29-33",
+    "34 A 38": "34-38",
+    "39 A 43": "39-43",
+    "44 A 48": "44-48",
+    "49 A 53": "49-53",
+    "54 A 58": "54-58",
+    "ACIMA DE 59": "59-999"
+}
+
+
+# =============================
+# ASSINATURA DOS PARÂMETROS
+# =============================
+# Hash das tabelas acima: entra na chave dos resultados salvos / em cache,
+# então um resultado calculado com parâmetros antigos não é reaproveitado
+def hash_parametros():
+    conteudo = hashlib.sha256()
+    conteudo.update(pd.util.hash_pandas_object(BASE_CM, index=True).to_numpy().tobytes())
+    conteudo.update(repr(sorted(PRODUTOS_PARAMETROS.items())).encode())
+    conteudo.update(LIMITES_VIDAS_PE.tobytes())
+    conteudo.update(PONTOS_EQUILIBRIO.tobytes())
+    conteudo.update(repr(sorted(MAPA_FAIXA.items())).encode())
+    return conteudo.hexdigest()[:16]
@@ -0,0 +1,34 @@
+"""Regras de classificação da coluna "obs"."""
+import numpy as np
+import pandas as pd
+
+# ============================
+# COMENTARIOS
+# ============================
+def _numerico(serie):
+    # Colunas com pd.NA ficam como object; converte para float64 com NaN
+    return pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+# Cada regra devolve uma máscara booleana calculada sobre a coluna inteira.
+# A ordem da lista define a ordem dos rótulos na coluna "obs".
+REGRAS_OBS = [
+    # 1. Ficou no piso (IPCA): meta igual ao financeiro (tolerância de arredondamento)
+    ("IPCA", lambda df: np.abs(_numerico(df["reajuste_meta"]) - _numerico(df["indice_financeiro"])) < 0.001),
+    # 2. Problema de Preço (projeção futura ruim)
+    ("Problema de Preço", lambda df: _numerico(df["reaj_preco"]) > _numerico(df["indice_financeiro"])),
+    # 3. Problema de Custo (variação do custo médio positiva; NaN nunca entra)
+    ("Problema de Custo", lambda df: _numerico(df["var_cm"]) > 0),
+]
+
+# Rótulo para cada combinação possível de regras (bit i = regra i atendida)
+ROTULOS_OBS = np.array([
+    " + ".join(nome for bit, (nome, _) in enumerate(REGRAS_OBS) if codigo >> bit & 1)
+    or "Em Análise"  # Se não caiu em nenhuma regra
+    for codigo in range(2 ** len(REGRAS_OBS))
+], dtype=object)
+
+def classificar_motivos(df):
+    codigos = np.zeros(len(df), dtype=np.intp)
+    for bit, (_, regra) in enumerate(REGRAS_OBS):
+        codigos |= regra(df).astype(np.intp) << bit
+    return pd.Series(ROTULOS_OBS[codigos], index=df.index)
@@ -0,0 +1,128 @@
+"""Execução do pipeline em segundo plano, com progresso e cancelamento.
+
+A TarefaPipeline roda a função numa thread própria (os DataFrames voltam
+sem cópia nem serialização, e o parse do pandas libera o GIL). O progresso
+vem da própria instrumentação: cada etapa medida marca início e fim. O
+cancelamento é cooperativo: vale a partir da próxima etapa, e dentro das
+etapas longas que o consultam (verificar_cancelamento entre os blocos do
+usr, interromper_ao_cancelar na consulta do DuckDB). A leitura do XLSX é uma
+chamada só e termina normalmente.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from .instrumentacao import Instrumentacao
+
+
+class TarefaCancelada(Exception):
+    pass
+
+
+class InstrumentacaoTarefa(Instrumentacao):
+    # etapas_previstas: nomes das etapas que a tarefa deve passar (executadas
+    # ou vindas do cache); servem de denominador do progresso
+    def __init__(self, etapas_previstas, medir_memoria=False):
+        super().__init__(medir_memoria=medir_memoria)
+        self.etapas_previstas = list(etapas_previstas)
+        self.em_andamento = []
+        self._interrupcoes = []
+        self._cancelar = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancelar(self):
+        self._cancelar.set()
+        with self._lock:
+            interrupcoes = list(self._interrupcoes)
+        for interromper in interrupcoes:
+            interromper()
+
+    @property
+    def cancelada(self):
+        return self._cancelar.is_set()
+
+    def verificar_cancelamento(self):
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+
+    # Enquanto o bloco roda, cancelar() também chama interromper() (por
+    # exemplo conexao.interrupt do DuckDB, que aborta a consulta em curso)
+    @contextmanager
+    def interromper_ao_cancelar(self, interromper):
+        with self._lock:
+            self._interrupcoes.append(interromper)
+        try:
+            self.verificar_cancelamento()
+            yield
+        finally:
+            with self._lock:
+                self._interrupcoes.remove(interromper)
+
+    def medir(self, etapa, funcao, *args, **kwargs):
+        self.verificar_cancelamento()
+        with self._lock:
+            self.em_andamento.append(etapa)
+        try:
+            resultado = super().medir(etapa, funcao, *args, **kwargs)
+        finally:
+            with self._lock:
+                self.em_andamento.remove(etapa)
+        return resultado
+
+    def progresso(self):
+        with self._lock:
+            em_andamento = list(self.em_andamento)
+        concluidas = [e["etapa"] for e in self.etapas if e["etapa"] in self.etapas_previstas]
+        previstas = len(self.etapas_previstas)
+        return {
+            "concluidas": concluidas,
+            "em_andamento": em_andamento,
+            "fracao": min(len(set(concluidas)) / previstas, 1.0) if previstas else 0.0,
+        }
+
+
+class TarefaPipeline:
+    # Roda funcao(*args, instrumentacao=..., **kwargs) numa thread daemon;
+    # chave identifica as entradas (quem chama decide se a tarefa ainda vale)
+    def __init__(self, funcao, *args, etapas=(), chave=None, medir_memoria=False, **kwargs):
+        self.chave = chave
+        self.instrumentacao = InstrumentacaoTarefa(etapas, medir_memoria=medir_memoria)
+        self.resultado = None
+        self.erro = None
+        self.iniciada_em = time.perf_counter()
+        self.segundos = None
+
+        self._thread = threading.Thread(
+            target=self._executar, args=(funcao, args, kwargs), name="precos-tarefa", daemon=True
+        )
+        self._thread.start()
+
+    def _executar(self, funcao, args, kwargs):
+        try:
+            self.resultado = funcao(*args, instrumentacao=self.instrumentacao, **kwargs)
+        except TarefaCancelada:
+            pass
+        except Exception as erro:
+            # Consulta interrompida pelo cancelamento não é falha
+            if not self.cancelada:
+                self.erro = erro
+        finally:
+            self.segundos = time.perf_counter() - self.iniciada_em
+
+    @property
+    def concluida(self):
+        return not self._thread.is_alive()
+
+    @property
+    def cancelada(self):
+        return self.instrumentacao.cancelada
+
+    def cancelar(self):
+        self.instrumentacao.cancelar()
+
+    def aguardar(self, timeout=None):
+        self._thread.join(timeout)
+        return self.concluida
+
+    def progresso(self):
+        return self.instrumentacao.progresso()
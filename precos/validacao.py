@@ -0,0 +1,145 @@
+"""Validação prévia das entradas e relatório de cobertura das junções.
+
+validar_entradas lê só o cabeçalho de cada arquivo (milissegundos, mesmo
+num XLSX grande) e confere as colunas com os esquemas antes do parse
+completo. relatorio_cobertura mostra, depois da leitura, quantos
+contratos / corporações ficam sem par em cada junção da consolidação.
+"""
+import difflib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .esquemas import ESQUEMA_BASE_12M, ESQUEMA_REAJUSTE, ESQUEMA_USR
+from .ingestao import _fonte, padronizar_colunas
+
+# Arquivo -> (esquema, formato quando não dá para deduzir pela extensão)
+ENTRADAS = {
+    "base_12m": (ESQUEMA_BASE_12M, "xlsx"),
+    "reajuste": (ESQUEMA_REAJUSTE, "csv"),
+    "usr": (ESQUEMA_USR, "csv"),
+}
+
+
+# =============================
+# CABEÇALHOS
+# =============================
+def _formato(arquivo, padrao):
+    if isinstance(arquivo, (str, Path)):
+        return {".xlsx": "xlsx", ".parquet": "parquet"}.get(Path(arquivo).suffix.lower(), "csv")
+    return padrao
+
+
+# Nomes padronizados do cabeçalho, sem ler as linhas. No XLSX o openpyxl
+# lê a planilha em fluxo e para na primeira linha (o calamine carregaria a
+# planilha inteira).
+def ler_cabecalho(arquivo, formato="csv"):
+    if formato == "xlsx":
+        colunas = pd.read_excel(_fonte(arquivo), engine="openpyxl", nrows=0).columns
+    elif formato == "parquet":
+        import pyarrow.parquet as pq
+        colunas = pd.Index(pq.read_schema(arquivo).names)
+    else:
+        colunas = pd.read_csv(_fonte(arquivo), sep=";", encoding="latin1", nrows=0).columns
+    return padronizar_colunas(colunas.astype(str))
+
+
+# Colunas do esquema que faltam no cabeçalho, com a coluna parecida mais
+# próxima entre as que sobraram (nome digitado errado, por exemplo)
+def validar_cabecalho(cabecalho, esquema):
+    sobrando = [col for col in cabecalho if col not in esquema]
+    return [
+        {
+            "coluna": col,
+            "sugestao": next(iter(difflib.get_close_matches(col, sobrando, n=1, cutoff=0.6)), None),
+        }
+        for col in esquema
+        if col not in cabecalho
+    ]
+
+
+# Uma linha por coluna ausente (vazio = tudo certo); arquivo ilegível vira
+# uma linha com o erro
+def validar_entradas(base_12m, reajuste, usr):
+    problemas = []
+    for nome, arquivo in (("base_12m", base_12m), ("reajuste", reajuste), ("usr", usr)):
+        esquema, padrao = ENTRADAS[nome]
+        try:
+            cabecalho = ler_cabecalho(arquivo, _formato(arquivo, padrao))
+        except Exception as erro:
+            problemas.append({"arquivo": nome, "coluna": None, "sugestao": None, "erro": f"{type(erro).__name__}: {erro}"})
+            continue
+
+        problemas.extend(
+            {"arquivo": nome, **ausente, "erro": None}
+            for ausente in validar_cabecalho(cabecalho, esquema)
+        )
+
+    return pd.DataFrame(problemas, columns=["arquivo", "coluna", "sugestao", "erro"])
+
+
+def descrever_problemas(df_problemas):
+    return "; ".join(
+        f"{linha.arquivo}: {linha.erro}" if linha.erro else
+        f"{linha.arquivo}: coluna {linha.coluna} ausente"
+        + (f" (seria {linha.sugestao}?)" if linha.sugestao else "")
+        for linha in df_problemas.itertuples()
+    )
+
+
+# =============================
+# COBERTURA DAS JUNÇÕES
+# =============================
+def _linha_cobertura(juncao, unidade, chaves, referencia, vidas=None):
+    # chaves: valores distintos de um lado; referencia: os do outro lado
+    sem_par = ~pd.Index(chaves).isin(referencia)
+    total = len(chaves)
+    return {
+        "juncao": juncao,
+        "unidade": unidade,
+        "total": total,
+        "com_par": int(total - sem_par.sum()),
+        "sem_par": int(sem_par.sum()),
+        "percentual_sem_par": sem_par.sum() / total if total else 0.0,
+        "vidas_sem_par": np.nan if vidas is None else float(vidas[sem_par].sum()),
+    }
+
+
+# Mesmas regras do consolidar_corporacoes: contrato do reajuste sem par no
+# base_12m some; corporação do base_12m sem nenhum contrato no reajuste sai
+# do resultado; corporação do resultado sem usr fica sem custo projetado
+def relatorio_cobertura(df_base_sel, df_reaj, df_custo_proj):
+    base = df_base_sel.dropna(subset=["id_contrato", "id_corporacao"])
+    contratos_base = pd.unique(base["id_contrato"])
+    corp_base = pd.unique(df_base_sel["id_corporacao"].dropna())
+
+    # Vidas por contrato do reajuste (para medir o que se perde)
+    vidas = (
+        np.nan_to_num(df_reaj["total_usuarios_coletivo"].to_numpy(dtype="float64", na_value=np.nan))
+        + np.nan_to_num(df_reaj["total_usuarios_privativo"].to_numpy(dtype="float64", na_value=np.nan))
+    )
+    vidas_contrato = pd.Series(vidas).groupby(df_reaj["codigo_contrato"].to_numpy(), sort=False).sum()
+    contratos_reaj = vidas_contrato.index.to_numpy()
+
+    # Corporações que ficam no resultado: as que têm contrato no reajuste
+    corp_resultado = pd.unique(base.loc[base["id_contrato"].isin(contratos_reaj), "id_corporacao"])
+    corp_usr = pd.unique(df_custo_proj["id_corporacao"])
+
+    linhas = [
+        {
+            "juncao": "base_12m",
+            "unidade": "linhas sem id_contrato / id_corporacao",
+            "total": len(df_base_sel),
+            "com_par": len(base),
+            "sem_par": len(df_base_sel) - len(base),
+            "percentual_sem_par": (len(df_base_sel) - len(base)) / len(df_base_sel) if len(df_base_sel) else 0.0,
+            "vidas_sem_par": np.nan,
+        },
+        _linha_cobertura("reajuste × base_12m", "contratos do reajuste", contratos_reaj, contratos_base, vidas_contrato.to_numpy()),
+        _linha_cobertura("base_12m × reajuste", "contratos do base_12m", contratos_base, contratos_reaj),
+        _linha_cobertura("base_12m × reajuste", "corporações do base_12m", corp_base, corp_resultado),
+        _linha_cobertura("resultado × usr", "corporações do resultado", corp_resultado, corp_usr),
+        _linha_cobertura("usr × resultado", "corporações do usr", corp_usr, corp_resultado),
+    ]
+    return pd.DataFrame(linhas)